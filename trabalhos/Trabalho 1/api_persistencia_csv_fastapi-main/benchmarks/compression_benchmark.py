@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_books import generate_books
+from services.book_store import BookStore
+from services.csv_compression import COMPRESSIONS, open_csv, zstandard
+from services.storage_engine import scan_csv, write_csv
+
+def _median_ms(function, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+# Mede, para cada formato, o tamanho em disco e a mediana das latências de
+# gravação completa (write_csv, como em cada mutação), carga do BookStore e
+# varredura em fluxo (scan_csv, usada por /export e pelas importações)
+def run_size(size: int, compressions, repeat: int, seed: int):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        plain = os.path.join(workdir, "books.csv")
+        generate_books(plain, size, seed)
+        books = BookStore(plain)
+        books.load()
+        catalog = books.all()
+        plain_size = os.path.getsize(plain)
+        for compression in compressions:
+            path = plain + COMPRESSIONS[compression][0]
+            if path != plain:
+                with open_csv(plain) as source, open_csv(path, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+            result = {
+                "compression": compression,
+                "size": size,
+                "file_bytes": os.path.getsize(path),
+                "ratio": round(plain_size / os.path.getsize(path), 2),
+                "write_ms": _median_ms(lambda: write_csv(path, catalog), repeat),
+                "load_ms": _median_ms(lambda: BookStore(path).load(), repeat),
+                "scan_ms": _median_ms(lambda: sum(1 for _ in scan_csv(path)), repeat),
+            }
+            print(
+                f"[{size}] {compression:<5} {result['file_bytes']:>12} bytes ({result['ratio']:.1f}x) "
+                f"write={result['write_ms']:.1f}ms load={result['load_ms']:.1f}ms scan={result['scan_ms']:.1f}ms",
+                file=sys.stderr,
+            )
+            results.append(result)
+    return results
+
+def main():
+    available = [name for name in COMPRESSIONS if name != 'zstd' or zstandard is not None]
+    parser = argparse.ArgumentParser(description="Compara o CSV do catálogo sem compressão, com gzip e com zstd")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--compressions", nargs="+", choices=list(COMPRESSIONS), default=available)
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições de cada medida")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="compression_results.json", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args.compressions, args.repeat, args.seed))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, mode='w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
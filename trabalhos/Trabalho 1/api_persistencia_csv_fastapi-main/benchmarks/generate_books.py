@@ -0,0 +1,43 @@
+import argparse
+import csv
+import random
+
+FIELDNAMES = ['id', 'title', 'author', 'year', 'genre', 'pages']
+
+WORDS = [
+    "amor", "sombra", "rio", "cidade", "noite", "mar", "sertão", "memórias", "tempo", "vento",
+    "casa", "jardim", "estrela", "caminho", "silêncio", "fogo", "pedra", "lua", "viagem", "guerra",
+    "segredo", "inverno", "ilha", "montanha", "espelho", "cartas", "sonho", "verão", "destino", "ponte",
+]
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabriela", "Hugo", "Íris", "João", "Lúcia", "Marcos"]
+LAST_NAMES = ["Almeida", "Barbosa", "Costa", "Dias", "Ferreira", "Gomes", "Lima", "Moura", "Nunes", "Pereira", "Rocha", "Souza"]
+GENRES = [
+    "Romance", "Poesia", "Conto", "Drama", "Fantasia", "Ficção Científica", "Biografia", "História",
+    "Suspense", "Terror", "Aventura", "Infantil", "Ensaio", "Crônica", "Humor", "Policial",
+]
+
+def random_book(rng: random.Random, book_id: int):
+    return {
+        'id': book_id,
+        'title': " ".join(rng.sample(WORDS, rng.randint(1, 4))).capitalize(),
+        'author': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        'year': rng.randint(1800, 2024),
+        'genre': rng.choice(GENRES),
+        'pages': rng.randint(40, 1200),
+    }
+
+def generate_books(path: str, count: int, seed: int = 42):
+    rng = random.Random(seed)
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for book_id in range(1, count + 1):
+            writer.writerow(random_book(rng, book_id))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um books.csv sintético")
+    parser.add_argument("count", type=int, help="Quantidade de livros")
+    parser.add_argument("--output", default="books.csv", help="Arquivo CSV de saída")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador aleatório")
+    args = parser.parse_args()
+    generate_books(args.output, args.count, args.seed)
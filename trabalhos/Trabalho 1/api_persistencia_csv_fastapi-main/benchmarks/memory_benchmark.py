@@ -0,0 +1,97 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_books import generate_books
+from services.book_store import BookStore
+from services.columnar_book_store import ColumnarBookStore
+
+STORES = {"csv": BookStore, "columnar": ColumnarBookStore}
+
+# Consultas medidas depois da carga: (descrição, função sobre o armazenamento)
+QUERIES = [
+    ("count_genre", lambda store: store.count(genre="rom")),
+    ("page_title", lambda store: store.page("amor", None, None, None, None, 0, 50)),
+    ("page_year_range_sorted", lambda store: store.page(None, None, None, None, None, 0, 50, (1900, 1950), None, "pages")),
+    ("count_breakdown", lambda store: store.count_breakdown()),
+]
+
+def _median_ms(function, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+# Memória ocupada pelo catálogo carregado (tracemalloc, que também enxerga os
+# buffers do NumPy) e latência mediana de algumas consultas em cada mecanismo
+def run_size(size: int, engines, repeat: int, seed: int):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_file = os.path.join(workdir, "books.csv")
+        generate_books(csv_file, size, seed)
+        for engine in engines:
+            gc.collect()
+            tracemalloc.start()
+            store = STORES[engine](csv_file)
+            started = time.perf_counter()
+            store.load()
+            load_ms = (time.perf_counter() - started) * 1000
+            gc.collect()
+            memory, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result = {
+                "engine": engine,
+                "size": size,
+                "memory_bytes": memory,
+                "bytes_per_book": round(memory / size, 1),
+                "load_ms": round(load_ms, 3),
+            }
+            for name, query in QUERIES:
+                result[f"{name}_ms"] = _median_ms(lambda: query(store), repeat)
+            print(
+                f"[{size}] {engine:<8} {memory / 2 ** 20:>8.1f} MiB ({result['bytes_per_book']:.0f} B/livro) "
+                + " ".join(f"{name}={result[f'{name}_ms']:.2f}ms" for name, _ in QUERIES),
+                file=sys.stderr,
+            )
+            results.append(result)
+            del store
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara memória e consultas dos mecanismos csv e columnar")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--engines", nargs="+", choices=list(STORES), default=list(STORES))
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições de cada consulta")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="memory_results.json", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args.engines, args.repeat, args.seed))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, mode='w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from generate_books import WORDS, GENRES, random_book, generate_books
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cada cenário gera a requisição (método, caminho, corpo) a partir do gerador
+# aleatório e do estado da rodada. As mutações consomem faixas de ids
+# separadas para que criações, atualizações e remoções sempre acertem.
+def _point_get(rng, state):
+    return "GET", f"/livros/{rng.randint(1, state['size'] // 2)}", None
+
+def _filtered_list(rng, state):
+    return "GET", "/livros/?" + urlencode({"title": rng.choice(WORDS), "genre": rng.choice(GENRES)[:4]}), None
+
+def _paginated_list(rng, state):
+    return "GET", "/livros/?" + urlencode({"skip": rng.randint(0, state['size'] - 50), "limit": 50}), None
+
+def _create(rng, state):
+    book = random_book(rng, next(state['new_ids']))
+    return "POST", "/livros/", book
+
+def _update(rng, state):
+    book_id = rng.randint(1, state['size'] // 2)
+    return "PUT", f"/livros/{book_id}", random_book(rng, book_id)
+
+def _delete(rng, state):
+    return "DELETE", f"/livros/{next(state['deleted_ids'])}", None
+
+def _count(rng, state):
+    return "GET", "/livros/count", None
+
+def _hash(rng, state):
+    return "GET", "/livros/hash", None
+
+def _download(rng, state):
+    return "GET", "/livros/download", None
+
+SCENARIOS = {
+    "point_get": _point_get,
+    "filtered_list": _filtered_list,
+    "paginated_list": _paginated_list,
+    "create": _create,
+    "update": _update,
+    "delete": _delete,
+    "count": _count,
+    "hash": _hash,
+    "download": _download,
+}
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _wait_ready(port: int, process, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("O servidor encerrou antes de ficar pronto")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/openapi.json")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Tempo esgotado esperando o servidor")
+
+def start_server(workdir: str, env_overrides: dict, startup_timeout: float):
+    # O servidor roda com o diretório de trabalho temporário para que o
+    # app.log e os arquivos de dados não toquem o projeto
+    static_link = os.path.join(workdir, "static")
+    if not os.path.exists(static_link):
+        os.symlink(os.path.join(PROJECT_DIR, "static"), static_link)
+    port = _free_port()
+    env = dict(os.environ, **env_overrides, BOOKS_CSV_FILE=os.path.join(workdir, "books.csv"))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", PROJECT_DIR,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env,
+    )
+    try:
+        _wait_ready(port, process, startup_timeout)
+    except Exception:
+        process.kill()
+        raise
+    return process, port
+
+def _percentile(values, fraction: float):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def run_scenario(port: int, name: str, state: dict, requests: int, concurrency: int, seed: int):
+    rng = random.Random(seed)
+    calls = [SCENARIOS[name](rng, state) for _ in range(requests)]
+    local = threading.local()
+
+    def send(call):
+        method, path, body = call
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            local.conn.request(method, path, body=payload, headers=headers)
+            response = local.conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            local.conn.close()
+            del local.conn
+            ok = False
+        return time.perf_counter() - start, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(send, calls))
+    elapsed = time.perf_counter() - started
+    latencies = [latency * 1000 for latency, _ in samples]
+    return {
+        "scenario": name,
+        "size": state['size'],
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(1 for _, ok in samples if not ok),
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(_percentile(latencies, 0.50), 3),
+        "p95_ms": round(_percentile(latencies, 0.95), 3),
+        "p99_ms": round(_percentile(latencies, 0.99), 3),
+    }
+
+def run_size(size: int, args, env_overrides: dict):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        generate_books(os.path.join(workdir, "books.csv"), size, args.seed)
+        started = time.perf_counter()
+        process, port = start_server(workdir, env_overrides, args.startup_timeout)
+        print(f"[{size}] servidor pronto em {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        try:
+            state = {
+                'size': size,
+                'new_ids': itertools.count(size + 1),
+                'deleted_ids': itertools.count(size // 2 + 1),
+            }
+            for concurrency in args.concurrency:
+                for name in args.scenarios:
+                    result = run_scenario(port, name, state, args.requests, concurrency, args.seed)
+                    print(
+                        f"[{size}] {name:<15} c={concurrency:<3} {result['throughput_rps']:>9.1f} req/s "
+                        f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+                        f"erros={result['errors']}",
+                        file=sys.stderr,
+                    )
+                    results.append(result)
+        finally:
+            process.terminate()
+            process.wait()
+    return results
+
+def compare(results, baseline_file: str, tolerance: float):
+    # Regressão: p95 acima do da linha de base pela tolerância dada
+    with open(baseline_file, encoding='utf-8') as file:
+        baseline = {
+            (item["scenario"], item["size"], item["concurrency"]): item
+            for item in json.load(file)["results"]
+        }
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["scenario"], result["size"], result["concurrency"]))
+        if previous and result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append({
+                "scenario": result["scenario"], "size": result["size"], "concurrency": result["concurrency"],
+                "baseline_p95_ms": previous["p95_ms"], "p95_ms": result["p95_ms"],
+            })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escala da API /livros")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--startup-timeout", type=float, default=1800, help="Segundos para o servidor carregar o catálogo")
+    parser.add_argument("--env", nargs="*", default=[], metavar="CHAVE=VALOR",
+                        help="Variáveis de configuração do servidor, ex.: BOOKS_ENGINE=sqlite")
+    parser.add_argument("--output", default="benchmark_results.json", help="Arquivo JSON com os resultados")
+    parser.add_argument("--baseline", help="Resultados anteriores para detectar regressões")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora tolerada no p95 em relação à linha de base")
+    args = parser.parse_args()
+
+    env_overrides = dict(item.split("=", 1) for item in args.env)
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args, env_overrides))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "env": env_overrides,
+            "requests_per_scenario": args.requests,
+        },
+        "results": results,
+    }
+    if args.baseline:
+        report["regressions"] = compare(results, args.baseline, args.tolerance)
+    with open(args.output, mode='w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    if report.get("regressions"):
+        for item in report["regressions"]:
+            print(f"REGRESSÃO {item}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
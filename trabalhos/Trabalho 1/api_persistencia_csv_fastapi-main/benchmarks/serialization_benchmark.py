@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_books import random_book
+from models.book import Book
+from services.book_json import BookJsonCache, orjson
+
+_BOOKS_ADAPTER = TypeAdapter(list[Book])
+
+# Formas de serializar uma página de livros: o response_model do FastAPI com o
+# JSONResponse padrão (revalida, converte pelo pydantic e serializa com json),
+# o mesmo com a serialização direta do pydantic, o json.dumps usado antes na
+# listagem e o cache de linhas frio e quente
+def _response_model(books, cache):
+    content = _BOOKS_ADAPTER.dump_python(_BOOKS_ADAPTER.validate_python(books), mode='json')
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+def _pydantic_dump_json(books, cache):
+    return _BOOKS_ADAPTER.dump_json(_BOOKS_ADAPTER.validate_python(books))
+
+def _json_dumps(books, cache):
+    return json.dumps([book.model_dump() for book in books], ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+def _row_cache_cold(books, cache):
+    return BookJsonCache(len(books)).join(books)
+
+def _row_cache_warm(books, cache):
+    return cache.join(books)
+
+METHODS = {
+    "response_model": _response_model,
+    "pydantic_dump_json": _pydantic_dump_json,
+    "json_dumps": _json_dumps,
+    "row_cache_cold": _row_cache_cold,
+    "row_cache_warm": _row_cache_warm,
+}
+
+def run_page(size: int, repeat: int, seed: int):
+    rng = random.Random(seed)
+    books = [Book(**random_book(rng, book_id)) for book_id in range(1, size + 1)]
+    cache = BookJsonCache(size)
+    cache.join(books)
+    results = []
+    for name, method in METHODS.items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            method(books, cache)
+        per_request = (time.perf_counter() - started) / repeat * 1e6
+        results.append({"method": name, "page_size": size, "us_per_request": round(per_request, 2)})
+        print(f"[{size}] {name:<18} {per_request:>10.1f} us/requisição", file=sys.stderr)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo de serializar uma página de /livros por método")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=200, help="Serializações medidas por método")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="serialization_results.json", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.page_sizes:
+        results.extend(run_page(size, args.repeat, args.seed))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "orjson": orjson is not None,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, mode='w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+
+CSV_FILE = os.getenv("BOOKS_CSV_FILE", "books.csv")
+
+# Mecanismo de armazenamento: "csv" (padrão), "columnar", "sqlite", "parquet"
+# ou "sharded". "columnar" usa o mesmo CSV com o catálogo em colunas
+# compactas na memória; os demais importam o CSV na primeira carga se os
+# arquivos deles não existirem.
+ENGINE = os.getenv("BOOKS_ENGINE", "csv")
+SQLITE_FILE = os.getenv("BOOKS_SQLITE_FILE", "books.db")
+PARQUET_FILE = os.getenv("BOOKS_PARQUET_FILE", "books.parquet")
+
+# Diretório e número de shards do mecanismo "sharded"; depois de criado, o
+# número de shards vem do manifesto
+SHARD_DIR = os.getenv("BOOKS_SHARD_DIR", "books_shards")
+SHARDS = int(os.getenv("BOOKS_SHARDS", 8))
+
+# "csv" reescreve o arquivo inteiro a cada mutação; "journal" anexa cada
+# mutação a um log ao lado do CSV e compacta quando ele passa do limite.
+STORAGE_MODE = os.getenv("BOOKS_STORAGE_MODE", "csv")
+JOURNAL_COMPACT_BYTES = int(os.getenv("BOOKS_JOURNAL_COMPACT_BYTES", 1024 * 1024))
+
+# Formato do CSV em disco: "none", "gzip" ou "zstd" (requer o pacote
+# zstandard). Comprimido, o catálogo fica em books.csv.gz ou books.csv.zst,
+# criado a partir do books.csv na primeira carga (somente com os mecanismos
+# "csv" e "columnar"; os demais recusam a inicialização).
+CSV_COMPRESSION = os.getenv("BOOKS_CSV_COMPRESSION", "none")
+
+# "memory" mantém o catálogo inteiro em memória; "index" mantém apenas um
+# índice id -> offset e lê cada livro direto do arquivo (somente com "csv").
+READ_MODE = os.getenv("BOOKS_READ_MODE", "memory")
+
+# Limite em bytes do cache de zips servidos em /livros/download
+ARCHIVE_CACHE_BYTES = int(os.getenv("BOOKS_ARCHIVE_CACHE_BYTES", 64 * 1024 * 1024))
+
+# Group commit: mutações concorrentes que chegam dentro da janela (em ms) são
+# aplicadas e gravadas juntas, em lotes de até BOOKS_GROUP_COMMIT_MAX itens
+GROUP_COMMIT_MS = float(os.getenv("BOOKS_GROUP_COMMIT_MS", 2))
+GROUP_COMMIT_MAX = int(os.getenv("BOOKS_GROUP_COMMIT_MAX", 256))
+
+# Cache LRU das páginas de GET /livros: número máximo de consultas guardadas
+# (0 desliga) e por quantos segundos cada uma vale
+QUERY_CACHE_ENTRIES = int(os.getenv("BOOKS_QUERY_CACHE_ENTRIES", 1024))
+QUERY_CACHE_TTL = float(os.getenv("BOOKS_QUERY_CACHE_TTL", 60))
+
+# Cache do JSON já serializado de cada livro: número máximo de livros
+# guardados (0 desliga)
+ROW_CACHE_ENTRIES = int(os.getenv("BOOKS_ROW_CACHE_ENTRIES", 100_000))
+
+# Importação de CSV em /livros/import: linhas por bloco validado e processos
+# do pool de validação (1 valida no próprio processo)
+IMPORT_CHUNK_ROWS = int(os.getenv("BOOKS_IMPORT_CHUNK_ROWS", 5000))
+IMPORT_WORKERS = int(os.getenv("BOOKS_IMPORT_WORKERS", os.cpu_count() or 1))
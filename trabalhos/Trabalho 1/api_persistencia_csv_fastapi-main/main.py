@@ -1,19 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 from fastapi.staticfiles import StaticFiles
-from routers import book_router
+from routers import book_router, metrics_router
 from services.book_service import BookService
+from services.request_stats import RequestLogMiddleware
 from models.book import Book
+import atexit
 import os
 import logging
+import logging.handlers
+import queue
 
-app = FastAPI()
+# Os registros vão para uma fila e uma thread separada (QueueListener) grava
+# no app.log, tirando a escrita em disco do caminho das requisições
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, logging.FileHandler('app.log', encoding='utf-8'), respect_handler_level=True
+)
+logging.basicConfig(
+    level=logging.INFO, format='%(asctime)s - %(message)s', handlers=[logging.handlers.QueueHandler(_log_queue)]
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    BookService.load()
+    yield
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(RequestLogMiddleware)
 app.include_router(book_router.router)
+app.include_router(metrics_router.router)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-logging.basicConfig(filename='app.log', level=logging.INFO, format='%(asctime)s - %(message)s')
-
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
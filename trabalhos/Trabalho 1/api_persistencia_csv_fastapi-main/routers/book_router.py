@@ -1,64 +1,176 @@
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse, HTMLResponse
+import tempfile
+from fastapi import APIRouter, Body, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, StreamingResponse
 from models.book import Book
+from services.book_json import dumps
 from services.book_service import BookService
-import zipfile
-import os
-import hashlib
 import logging
-import pandas as pd
 
-router = APIRouter(prefix="/livros")
+# Resposta JSON das rotas de livros: bytes já serializados (do cache de
+# linhas) saem como estão, sem passar pela validação do response_model, e o
+# resto é serializado com orjson
+class BookJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+router = APIRouter(prefix="/livros", default_response_class=BookJSONResponse)
+
+# Até este tamanho o CSV enviado a /livros/import fica em memória; acima, vai
+# para um arquivo temporário
+IMPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+def _etag_matches(if_none_match: str, etag: str):
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def _book_response(book: Book, response: Response = None):
+    # Repete os cabeçalhos de cache que _not_modified deixou em `response`
+    headers = {name: response.headers[name] for name in ("ETag", "Cache-Control")} if response else None
+    return BookJSONResponse(content=BookService.book_json(book), headers=headers)
+
+def _not_modified(response: Response, if_none_match: str):
+    # A ETag é a versão do catálogo, lida antes dos dados; se o cliente já tem
+    # essa versão, devolve 304 sem consultar o armazenamento
+    etag = BookService.catalog_etag()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
 
 @router.get("/", response_model=list[Book])
 def get_books(
+    response: Response,
     title: str = Query(None, description="Filtrar por título"),
     author: str = Query(None, description="Filtrar por autor"),
     year: int = Query(None, description="Filtrar por ano"),
     genre: str = Query(None, description="Filtrar por gênero"),
-    skip: int = Query(0, description="Pegar a partir do registro de índice"),
-    limit: int = Query(10, description="Número máximo de registros a serem retornados")
+    skip: int = Query(0, ge=0, description="Pegar a partir do registro de índice"),
+    limit: int = Query(10, ge=0, description="Número máximo de registros a serem retornados"),
+    cursor: str = Query(None, description="Cursor da próxima página, retornado no cabeçalho X-Next-Cursor"),
+    year_min: int = Query(None, description="Ano mínimo (inclusivo)"),
+    year_max: int = Query(None, description="Ano máximo (inclusivo)"),
+    pages_min: int = Query(None, description="Número mínimo de páginas (inclusivo)"),
+    pages_max: int = Query(None, description="Número máximo de páginas (inclusivo)"),
+    sort_by: str = Query(None, pattern="^(year|pages)$", description="Ordenar por year ou pages"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Sentido da ordenação: asc ou desc"),
+    if_none_match: str = Header(None)
 ):
-    books = BookService.read_books()
-    if title:
-        books = [book for book in books if title.lower() in book.title.lower()]
-    if author:
-        books = [book for book in books if author.lower() in book.author.lower()]
-    if year:
-        books = [book for book in books if book.year == year]
-    if genre:
-        books = [book for book in books if genre.lower() in book.genre.lower()]
+    if (not_modified := _not_modified(response, if_none_match)) is not None:
+        return not_modified
+    try:
+        body, next_cursor = BookService.list_books_json(
+            title=title, author=author, year=year, genre=genre, skip=skip, limit=limit, cursor=cursor,
+            year_min=year_min, year_max=year_max, pages_min=pages_min, pages_max=pages_max,
+            sort_by=sort_by, order=order
+        )
+    except ValueError as e:
+        logging.error("Cursor de paginação rejeitado: %s", cursor)
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {name: response.headers[name] for name in ("ETag", "Cache-Control")}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
     logging.info("Livros recuperados com filtros - título: %s, autor: %s, ano: %s, gênero: %s", title, author, year, genre)
-    return books[skip:skip + limit]
+    return BookJSONResponse(content=body, headers=headers)
 
 @router.get("/count", response_model=int)
-def get_books_count():
-    df = pd.read_csv("books.csv")
-    count = len(df)
+def get_books_count(
+    response: Response,
+    title: str = Query(None, description="Filtrar por título"),
+    author: str = Query(None, description="Filtrar por autor"),
+    year: int = Query(None, description="Filtrar por ano"),
+    genre: str = Query(None, description="Filtrar por gênero"),
+    if_none_match: str = Header(None)
+):
+    if (not_modified := _not_modified(response, if_none_match)) is not None:
+        return not_modified
+    count = BookService.count_books(title=title, author=author, year=year, genre=genre)
     logging.info("Quantidade de livros recuperada - Total: %d", count)
     return count
 
-@router.get("/download", response_class=FileResponse)
+@router.get("/count/breakdown", response_model=dict)
+def get_books_count_breakdown():
+    breakdown = BookService.count_breakdown()
+    logging.info("Quantidade de livros por gênero e ano recuperada - Total: %d", breakdown["total"])
+    return breakdown
+
+@router.get("/download", response_class=StreamingResponse)
 def download_books():
-    csv_file = "books.csv"
-    zip_file = "books.zip"
-    
-    with zipfile.ZipFile(zip_file, 'w') as zipf:
-        zipf.write(csv_file, os.path.basename(csv_file))
-    
+    compressed = BookService.compressed_download()
+    if compressed is not None:
+        filename, media_type = compressed
+        logging.info("Arquivo CSV dos livros servido já comprimido")
+        return StreamingResponse(
+            BookService.stream_compressed(), media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    headers = {"Content-Disposition": 'attachment; filename="books.zip"'}
+    archive = BookService.cached_archive()
+    if archive is not None:
+        logging.info("Arquivo CSV dos livros servido do cache de compactação")
+        return Response(content=archive, media_type='application/zip', headers=headers)
     logging.info("Arquivo CSV dos livros compactado")
-    return FileResponse(zip_file, media_type='application/zip', filename=zip_file)
+    return StreamingResponse(BookService.stream_archive(), media_type='application/zip', headers=headers)
 
 @router.get("/hash", response_model=dict)
-def get_csv_hash():
-    csv_file = "books.csv"
-    sha256_hash = hashlib.sha256()
-    with open(csv_file, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    hash_value = sha256_hash.hexdigest()
+def get_csv_hash(response: Response, if_none_match: str = Header(None)):
+    if (not_modified := _not_modified(response, if_none_match)) is not None:
+        return not_modified
+    hash_value, merkle_root = BookService.file_hash()
     logging.info("Hash SHA256 do arquivo CSV: %s", hash_value)
-    return {"hash_sha256": hash_value}
+    return {"hash_sha256": hash_value, "merkle_root": merkle_root}
+
+@router.get("/export")
+def export_books(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="Formato da exportação: ndjson ou csv")
+):
+    logging.info("Exportação do catálogo iniciada - formato: %s", export_format)
+    if export_format == "csv":
+        return StreamingResponse(
+            BookService.export_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="books.csv"'}
+        )
+    return StreamingResponse(BookService.export_ndjson(), media_type="application/x-ndjson")
+
+@router.post("/bulk", response_model=dict)
+def create_books(items: list[dict] = Body(..., description="Livros a serem criados")):
+    result = BookService.create_books(items)
+    logging.info("Livros criados em lote - Sucesso: %d, Erros: %d", len(result["succeeded"]), len(result["errors"]))
+    return result
+
+@router.put("/bulk", response_model=dict)
+def update_books(items: list[dict] = Body(..., description="Livros a serem atualizados, identificados pelo ID")):
+    result = BookService.update_books(items)
+    logging.info("Livros atualizados em lote - Sucesso: %d, Erros: %d", len(result["succeeded"]), len(result["errors"]))
+    return result
+
+@router.delete("/bulk", response_model=dict)
+def delete_books(book_ids: list[int] = Body(..., description="IDs dos livros a serem deletados")):
+    result = BookService.delete_books(book_ids)
+    logging.info("Livros deletados em lote - Sucesso: %d, Erros: %d", len(result["succeeded"]), len(result["errors"]))
+    return result
+
+@router.post("/import", response_model=dict)
+async def import_books(request: Request):
+    # O corpo é o CSV cru (text/csv), recebido em fluxo e importado no threadpool
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        try:
+            result = await run_in_threadpool(BookService.import_csv, upload)
+        except ValueError as e:
+            logging.error("Importação de CSV rejeitada: %s", e)
+            raise HTTPException(status_code=400, detail=str(e))
+    logging.info("Livros importados do CSV - Sucesso: %d, Erros: %d", result["imported"], len(result["errors"]))
+    return result
 
 @router.get("/interface", response_class=HTMLResponse)
 def get_interface():
@@ -66,11 +178,13 @@ def get_interface():
         return HTMLResponse(content=f.read(), status_code=200)
 
 @router.get("/{book_id}", response_model=Book)
-def get_book(book_id: int):
+def get_book(book_id: int, response: Response, if_none_match: str = Header(None)):
+    if (not_modified := _not_modified(response, if_none_match)) is not None:
+        return not_modified
     book = BookService.get_book(book_id)
     if book:
         logging.info("Livro recuperado - ID: %d", book_id)
-        return book
+        return _book_response(book, response)
     logging.error("Livro não encontrado - ID: %d", book_id)
     raise HTTPException(status_code=404, detail=f"Livro com ID {book_id} não encontrado")
 
@@ -78,16 +192,21 @@ def get_book(book_id: int):
 def create_book(book: Book):
     if BookService.create_book(book):
         logging.info("Livro criado - ID: %d", book.id)
-        return book
+        return _book_response(book)
     logging.error("Falha ao criar o livro - ID: %d", book.id)
     raise HTTPException(status_code=400, detail=f"Livro com ID {book.id} já existe")
 
 @router.put("/{book_id}", response_model=Book)
 def update_book(book_id: int, updated_book: Book):
-    book = BookService.update_book(book_id, updated_book)
+    try:
+        book = BookService.update_book(book_id, updated_book)
+    except ValueError as e:
+        # Troca para um id que já pertence a outro livro
+        logging.error("Falha ao atualizar o livro - ID: %d: %s", book_id, e)
+        raise HTTPException(status_code=400, detail=str(e))
     if book:
         logging.info("Livro atualizado - ID: %d", book_id)
-        return book
+        return _book_response(book)
     logging.error("Falha ao atualizar o livro - ID: %d", book_id)
     raise HTTPException(status_code=404, detail=f"Livro com ID {book_id} não encontrado")
 
@@ -96,6 +215,6 @@ def delete_book(book_id: int):
     book = BookService.delete_book(book_id)
     if book:
         logging.info("Livro deletado - ID: %d", book_id)
-        return book
+        return _book_response(book)
     logging.error("Falha ao deletar o livro - ID: %d", book_id)
     raise HTTPException(status_code=404, detail=f"Livro com ID {book_id} não encontrado")
\ No newline at end of file
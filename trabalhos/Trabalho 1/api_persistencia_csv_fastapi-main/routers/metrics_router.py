@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from services import metrics
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,70 @@
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+
+ARCHIVE_CHUNK_BYTES = 64 * 1024
+
+# Cache LRU dos zips já montados, indexado pelo SHA-256 do CSV compactado.
+# O total de bytes guardados é limitado por max_bytes.
+class ArchiveCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+class _ChunkSink:
+    # Destino não posicionável para o ZipFile: acumula o que foi escrito até
+    # ser drenado pelo gerador que alimenta a resposta.
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+def stream_zip(csv_file: str, arcname: str):
+    sink = _ChunkSink()
+    size = os.path.getsize(csv_file)
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
+        info = zipfile.ZipInfo.from_file(csv_file, arcname)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with zipf.open(info, 'w', force_zip64=size > zipfile.ZIP64_LIMIT) as entry, open(csv_file, 'rb') as src:
+            while chunk := src.read(ARCHIVE_CHUNK_BYTES):
+                entry.write(chunk)
+                yield from sink.drain()
+    yield from sink.drain()
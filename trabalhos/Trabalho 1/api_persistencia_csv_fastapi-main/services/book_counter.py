@@ -0,0 +1,54 @@
+from collections import Counter
+from models.book import Book
+
+# Contadores mantidos a cada carga e mutação do BookStore: total de livros e
+# quantidade por gênero, por ano e por par (gênero, ano). Respondem
+# /livros/count sem percorrer o catálogo.
+class BookCounter:
+    def __init__(self):
+        self.total = 0
+        self.genres = Counter()
+        self.years = Counter()
+        self._genre_years = Counter()
+
+    def on_reset(self, books):
+        self.__init__()
+        for book in books:
+            self._add(book)
+
+    def on_upsert(self, old_book, new_book: Book):
+        if old_book is not None:
+            self._remove(old_book)
+        self._add(new_book)
+
+    def on_upsert_many(self, changes):
+        for old_book, new_book in changes:
+            self.on_upsert(old_book, new_book)
+
+    def on_delete(self, book: Book):
+        self._remove(book)
+
+    def on_delete_many(self, books):
+        for book in books:
+            self._remove(book)
+
+    def _add(self, book: Book):
+        self.total += 1
+        self.genres[book.genre] += 1
+        self.years[book.year] += 1
+        self._genre_years[(book.genre, book.year)] += 1
+
+    def _remove(self, book: Book):
+        self.total -= 1
+        for counter, key in ((self.genres, book.genre), (self.years, book.year), (self._genre_years, (book.genre, book.year))):
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
+
+    def count(self, year: int = None, genre: str = None):
+        if not genre:
+            return self.years.get(year, 0) if year else self.total
+        genre = genre.lower()
+        if year:
+            return sum(n for (g, y), n in self._genre_years.items() if y == year and genre in g.lower())
+        return sum(n for g, n in self.genres.items() if genre in g.lower())
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import threading
+from services.csv_compression import open_csv
+
+HASH_CHUNK_BYTES = 64 * 1024
+
+# Hash SHA-256 do CSV em cache, indexado pela identidade do arquivo (inode,
+# tamanho, mtime). Um CSV comprimido é hasheado descomprimido, então o hash
+# não depende do formato em disco. O arquivo também é dividido em blocos fixos que formam uma
+# árvore de Merkle; guardando o estado do SHA-256 no início de cada bloco,
+# uma escrita que só altera o arquivo a partir de um offset (avisada via
+# mark_dirty) faz rehash apenas dos blocos seguintes.
+class CsvHasher:
+    def __init__(self, csv_file: str, chunk_size: int = HASH_CHUNK_BYTES):
+        self.csv_file = csv_file
+        self.chunk_size = chunk_size
+        self._identity = None
+        self._states = []
+        self._chunk_hashes = []
+        self._sha256 = None
+        self._merkle_root = None
+        self._dirty_from = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _file_identity(self):
+        try:
+            stat = os.stat(self.csv_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def mark_dirty(self, offset: int):
+        with self._lock:
+            if self._dirty_from is None or offset < self._dirty_from:
+                self._dirty_from = offset
+
+    def digest(self):
+        with self._lock:
+            identity = self._file_identity()
+            if identity != self._identity or self._sha256 is None:
+                self.misses += 1
+                first = 0
+                if self._dirty_from is not None and self._identity is not None:
+                    first = min(self._dirty_from // self.chunk_size, len(self._chunk_hashes))
+                self._rehash(first)
+                self._identity = identity
+                self._dirty_from = None
+            else:
+                self.hits += 1
+            return self._sha256, self._merkle_root
+
+    def _rehash(self, first: int):
+        states = self._states[:first + 1] or [hashlib.sha256()]
+        chunk_hashes = self._chunk_hashes[:first]
+        state = states[-1].copy()
+        if os.path.exists(self.csv_file):
+            with open_csv(self.csv_file) as file:
+                file.seek(first * self.chunk_size)
+                while chunk := file.read(self.chunk_size):
+                    chunk_hashes.append(hashlib.sha256(chunk).digest())
+                    state.update(chunk)
+                    states.append(state.copy())
+        self._states = states
+        self._chunk_hashes = chunk_hashes
+        self._sha256 = state.hexdigest()
+        self._merkle_root = self._root(chunk_hashes)
+
+    @staticmethod
+    def _root(chunk_hashes):
+        if not chunk_hashes:
+            return hashlib.sha256(b'').hexdigest()
+        level = chunk_hashes
+        while len(level) > 1:
+            level = [
+                hashlib.sha256(b''.join(level[i:i + 2])).digest() if i + 1 < len(level) else level[i]
+                for i in range(0, len(level), 2)
+            ]
+        return level[0].hex()
@@ -0,0 +1,86 @@
+import csv
+import io
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pydantic import ValidationError
+from models.book import Book
+from services.storage_engine import FIELDNAMES
+
+def validation_detail(error: ValidationError):
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+def error_id(value):
+    # Id de um item recusado na mesma forma dos demais erros: inteiro, ou None
+    # quando o valor enviado nem é um número
+    try:
+        return int(str(value))
+    except ValueError:
+        return None
+
+def validate_chunk(rows):
+    # Roda nos processos do pool: valida cada (linha, campos) e devolve os
+    # livros válidos com sua linha e os erros por linha
+    books = []
+    errors = []
+    for line, fields in rows:
+        try:
+            books.append((line, Book(**fields)))
+        except ValidationError as e:
+            errors.append({"line": line, "id": error_id(fields.get("id")), "detail": validation_detail(e)})
+    return books, errors
+
+def read_chunks(file, chunk_rows: int):
+    # Lê o CSV (binário) em blocos de `chunk_rows` linhas, mapeando os campos
+    # pelo cabeçalho; `line` é a linha no arquivo, contando o cabeçalho
+    reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    header = next(reader, None)
+    if header is None or not set(FIELDNAMES) <= set(header):
+        raise ValueError(f"O CSV deve ter o cabeçalho {','.join(FIELDNAMES)}")
+    chunk = []
+    for row in reader:
+        if not row:
+            continue
+        chunk.append((reader.line_num, dict(zip(header, row))))
+        if len(chunk) == chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# Importação de CSVs grandes: o arquivo é lido em blocos e cada bloco é
+# validado pelo pydantic em um pool de processos, espalhando o custo da
+# validação pelos núcleos. Até dois blocos por worker ficam em validação
+# enquanto o próximo é lido; com um único worker valida no próprio processo.
+class BookImporter:
+    def __init__(self, workers: int, chunk_rows: int):
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        # Criado na primeira importação; "spawn" evita herdar por fork as
+        # threads e travas do servidor
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def validate(self, file):
+        # Gera (livros válidos, erros) de cada bloco, na ordem do arquivo
+        chunks = read_chunks(file, self.chunk_rows)
+        if self.workers <= 1:
+            yield from map(validate_chunk, chunks)
+            return
+        pool = self._executor()
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(validate_chunk, chunk))
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,63 @@
+import json
+import os
+import time
+from models.book import Book
+from services.metrics import CSV_BYTES_READ, CSV_BYTES_WRITTEN, record_validation
+from services.request_stats import timed
+
+class BookJournal:
+    def __init__(self, csv_file: str):
+        self.path = csv_file + '.journal'
+
+    def signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def record(self, upserts=(), deletes=()):
+        records = [{'op': 'delete', 'id': book_id} for book_id in deletes]
+        records += [{'op': 'upsert', 'book': book.model_dump()} for book in upserts]
+        data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+        with timed('write_ms'), open(self.path, mode='ab') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        CSV_BYTES_WRITTEN.inc(len(data))
+
+    def replay(self, books: dict):
+        if not os.path.exists(self.path):
+            return books
+        CSV_BYTES_READ.inc(self.size())
+        with open(self.path, mode='rb+') as file:
+            end = 0
+            for line in file:
+                if not line.endswith(b'\n'):
+                    # Última linha truncada por uma escrita interrompida: é
+                    # cortada do arquivo, senão o próximo registro seria
+                    # anexado a ela e se perderia junto na carga seguinte
+                    file.truncate(end)
+                    break
+                end += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record['op'] == 'upsert':
+                    started = time.perf_counter()
+                    book = Book(**record['book'])
+                    record_validation(time.perf_counter() - started)
+                    books[book.id] = book
+                elif record['op'] == 'delete':
+                    books.pop(record['id'], None)
+        return books
+
+    def truncate(self):
+        open(self.path, mode='w').close()
@@ -0,0 +1,54 @@
+import json
+import threading
+from collections import OrderedDict
+from models.book import Book
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps(value):
+    # JSON compacto em UTF-8; usa o orjson quando instalado
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+# Cache LRU do JSON de cada livro, indexado pelo id. A entrada guarda o
+# próprio livro e só vale enquanto ele for igual ao pedido, então uma
+# alteração invalida a linha sem aviso do armazenamento; no mecanismo `csv`,
+# que devolve sempre o mesmo objeto, a comparação para na identidade.
+# Listas são montadas juntando os bytes das linhas.
+class BookJsonCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, book: Book):
+        with self._lock:
+            entry = self._entries.get(book.id)
+            if entry is not None and (entry[0] is book or entry[0] == book):
+                self._entries.move_to_end(book.id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        # Serializado direto pelo pydantic-core, sem passar por um dict
+        data = book.model_dump_json().encode('utf-8')
+        if self.max_entries:
+            with self._lock:
+                self._entries[book.id] = (book, data)
+                self._entries.move_to_end(book.id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return data
+
+    def join(self, books):
+        return b'[' + b','.join(self.get(book) for book in books) + b']'
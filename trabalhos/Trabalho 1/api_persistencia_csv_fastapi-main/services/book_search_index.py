@@ -0,0 +1,105 @@
+from models.book import Book
+
+TEXT_FIELDS = ('title', 'author', 'genre')
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+# Índice invertido de trigramas sobre título, autor e gênero, mais um índice
+# hash exato por ano. Uma busca por substring intersecta as listas de
+# postagem dos trigramas da consulta e só confere os candidatos restantes.
+# É mantido pelo BookStore a cada carga e mutação. Com uma `sequence` (a
+# ordem global de um catálogo particionado), resultados seguem as posições
+# dela em vez da ordem local de inserção.
+class BookSearchIndex:
+    def __init__(self, sequence=None):
+        self._postings = {field: {} for field in TEXT_FIELDS}
+        self._values = {}
+        self._years = {}
+        self._order = {}
+        self._next_order = 0
+        self._sequence = sequence
+
+    def on_reset(self, books):
+        self.__init__(self._sequence)
+        for book in books:
+            self._index(book, self._new_order(book.id))
+
+    def _new_order(self, book_id: int):
+        if self._sequence is not None:
+            return self._sequence[book_id]
+        order = self._next_order
+        self._next_order += 1
+        return order
+
+    def on_upsert(self, old_book, new_book: Book):
+        if old_book is None:
+            order = self._new_order(new_book.id)
+        else:
+            order = self._order[old_book.id]
+            self._unindex(old_book.id)
+        self._index(new_book, order)
+
+    def on_upsert_many(self, changes):
+        for old_book, new_book in changes:
+            self.on_upsert(old_book, new_book)
+
+    def on_delete(self, book: Book):
+        self._unindex(book.id)
+
+    def on_delete_many(self, books):
+        for book in books:
+            self._unindex(book.id)
+
+    def _index(self, book: Book, order: int):
+        values = tuple(getattr(book, field).lower() for field in TEXT_FIELDS)
+        self._values[book.id] = (values, book.year)
+        self._order[book.id] = order
+        for field, value in zip(TEXT_FIELDS, values):
+            postings = self._postings[field]
+            for trigram in _trigrams(value):
+                postings.setdefault(trigram, set()).add(book.id)
+        self._years.setdefault(book.year, set()).add(book.id)
+
+    def _unindex(self, book_id: int):
+        values, year = self._values.pop(book_id)
+        del self._order[book_id]
+        for field, value in zip(TEXT_FIELDS, values):
+            postings = self._postings[field]
+            for trigram in _trigrams(value):
+                ids = postings[trigram]
+                ids.discard(book_id)
+                if not ids:
+                    del postings[trigram]
+        ids = self._years[year]
+        ids.discard(book_id)
+        if not ids:
+            del self._years[year]
+
+    def _candidates(self, field: str, query: str):
+        trigrams = _trigrams(query)
+        if not trigrams:
+            return None
+        postings = self._postings[field]
+        sets = sorted((postings.get(trigram, set()) for trigram in trigrams), key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
+    def search(self, title: str = None, author: str = None, year: int = None, genre: str = None, ordered: bool = True):
+        ids = None
+        if year:
+            ids = set(self._years.get(year, set()))
+        for position, (field, query) in enumerate(zip(TEXT_FIELDS, (title, author, genre))):
+            if not query:
+                continue
+            query = query.lower()
+            candidates = self._candidates(field, query)
+            if ids is not None:
+                candidates = ids if candidates is None else ids & candidates
+            elif candidates is None:
+                candidates = self._values.keys()
+            ids = {book_id for book_id in candidates if query in self._values[book_id][0][position]}
+        if ids is None:
+            ids = self._values.keys()
+        if not ordered:
+            return ids
+        return sorted(ids, key=self._order.__getitem__)
@@ -0,0 +1,123 @@
+import os
+import threading
+from services.metrics import CSV_BYTES_WRITTEN
+from services.request_stats import timed
+
+# Linhas a mais toleradas no log antes de regravá-lo só com os ids vivos
+COMPACT_SLACK = 1024
+
+# Ordem global de um catálogo particionado: a posição de cada id na sequência
+# de inserção. Os shards a usam para ordenar e desempatar seus resultados e o
+# ShardedBookStore para intercalá-los, então a listagem segue a mesma ordem
+# dos demais mecanismos. Persistida em um log só de anexos: "a <id>" dá ao id
+# a próxima posição e "r <antigo> <novo>" passa a posição de um id a outro.
+# Remoções não são registradas: o log é regravado só com os ids vivos na
+# carga e quando passa do dobro deles.
+class BookSequence:
+    def __init__(self, path: str):
+        self.path = path
+        self._positions = {}
+        self._next = 0
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        # Devolve se o log existia; sem ele, as posições são dadas na ordem em
+        # que os ids forem consultados
+        self._positions = {}
+        self._next = 0
+        self._lines = 0
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, mode='rb+') as file:
+            end = 0
+            for line in file:
+                if not line.endswith(b'\n'):
+                    # Última linha truncada por uma escrita interrompida: é
+                    # cortada para que o próximo anexo comece em linha própria
+                    file.truncate(end)
+                    break
+                end += len(line)
+                parts = line.split()
+                self._lines += 1
+                try:
+                    if parts[0] == b'a':
+                        self._positions[int(parts[1])] = self._next
+                        self._next += 1
+                    elif parts[0] == b'r':
+                        self._positions[int(parts[2])] = self._positions.pop(int(parts[1]))
+                except (IndexError, KeyError, ValueError):
+                    continue
+        return True
+
+    def __getitem__(self, book_id: int):
+        with self._lock:
+            position = self._positions.get(book_id)
+            if position is None:
+                # Id sem posição registrada (shards anteriores ao log): entra
+                # no fim, e a compactação da carga o grava
+                position = self._positions[book_id] = self._next
+                self._next += 1
+            return position
+
+    def _log(self, lines):
+        data = ''.join(lines).encode('utf-8')
+        with timed('write_ms'), open(self.path, mode='ab') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        CSV_BYTES_WRITTEN.inc(len(data))
+        self._lines += len(lines)
+        if self._lines > 2 * len(self._positions) + COMPACT_SLACK:
+            self._rewrite()
+
+    def append(self, book_ids):
+        # Registra os ids novos antes de gravá-los nos shards
+        with self._lock:
+            for book_id in book_ids:
+                self._positions[book_id] = self._next
+                self._next += 1
+            if book_ids:
+                self._log([f'a {book_id}\n' for book_id in book_ids])
+
+    def rename(self, old_id: int, new_id: int):
+        with self._lock:
+            self._positions[new_id] = self._positions.pop(old_id)
+            self._log([f'r {old_id} {new_id}\n'])
+
+    def discard(self, book_ids):
+        with self._lock:
+            for book_id in book_ids:
+                self._positions.pop(book_id, None)
+
+    def reset(self, book_ids):
+        with self._lock:
+            self._positions = {}
+            self._next = 0
+            for book_id in book_ids:
+                self._positions[book_id] = self._next
+                self._next += 1
+            self._rewrite()
+
+    def compact(self, book_ids):
+        # Mantém só os ids presentes nos shards e regrava o log se ele tinha
+        # linhas a mais. As posições em memória não mudam: os índices dos
+        # shards já as usam
+        with self._lock:
+            live = set(book_ids)
+            for book_id in [book_id for book_id in self._positions if book_id not in live]:
+                del self._positions[book_id]
+            if self._lines != len(self._positions) or not os.path.exists(self.path):
+                self._rewrite()
+
+    def _rewrite(self):
+        ids = sorted(self._positions, key=self._positions.__getitem__)
+        data = ''.join(f'a {book_id}\n' for book_id in ids).encode('utf-8')
+        tmp_file = self.path + '.tmp'
+        with timed('write_ms'), open(tmp_file, mode='wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_file, self.path)
+        CSV_BYTES_WRITTEN.inc(len(data))
+        self._lines = len(ids)
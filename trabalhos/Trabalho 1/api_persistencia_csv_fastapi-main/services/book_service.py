@@ -1,63 +1,373 @@
-import csv
+import base64
+import hashlib
+import json
 import os
-import pandas as pd
+import time
+import uuid
+from config import (
+    CSV_FILE, CSV_COMPRESSION, ENGINE, SQLITE_FILE, PARQUET_FILE, SHARD_DIR, SHARDS, STORAGE_MODE, JOURNAL_COMPACT_BYTES, READ_MODE,
+    ARCHIVE_CACHE_BYTES, GROUP_COMMIT_MS, GROUP_COMMIT_MAX, QUERY_CACHE_ENTRIES, QUERY_CACHE_TTL,
+    IMPORT_CHUNK_ROWS, IMPORT_WORKERS, ROW_CACHE_ENTRIES,
+)
+from pydantic import ValidationError
 from models.book import Book
+from services.book_archive import ArchiveCache, stream_zip
+from services.book_hasher import CsvHasher
+from services.book_import import BookImporter, error_id, validation_detail
+from services.book_json import BookJsonCache
+from services.book_journal import BookJournal
+from services.book_store import BookStore
+from services.book_writer import BookWriter
+from services.columnar_book_store import ColumnarBookStore
+from services.csv_compression import COMPRESSIONS, check_compression, compression_of, open_csv
+from services.metrics import MetricFunction, ratio, record_validation
+from services.indexed_book_store import IndexedBookStore
+from services.parquet_book_store import ParquetBookStore
+from services.query_cache import QueryCache
+from services.sharded_book_store import ShardedBookStore
+from services.sqlite_book_store import SqliteBookStore
+from services.storage_engine import scan_csv
 
-CSV_FILE = 'books.csv'
+EXPORT_BATCH_ROWS = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Distingue as ETags de execuções diferentes, já que a versão do catálogo
+# recomeça do zero a cada inicialização
+_INSTANCE = uuid.uuid4().hex[:8]
+
+def _build_store():
+    check_compression(CSV_COMPRESSION)
+    if CSV_COMPRESSION != "none" and ENGINE in ("sqlite", "parquet", "sharded"):
+        raise ValueError(f"BOOKS_ENGINE={ENGINE} não suporta CSV comprimido")
+    if ENGINE == "sqlite":
+        return SqliteBookStore(SQLITE_FILE, seed_csv=CSV_FILE)
+    if ENGINE == "parquet":
+        return ParquetBookStore(PARQUET_FILE, seed_csv=CSV_FILE)
+    if ENGINE == "sharded":
+        return ShardedBookStore(
+            SHARD_DIR, SHARDS, seed_csv=CSV_FILE,
+            journal=STORAGE_MODE == "journal", compact_bytes=JOURNAL_COMPACT_BYTES
+        )
+    csv_file = CSV_FILE + COMPRESSIONS[CSV_COMPRESSION][0]
+    seed_csv = CSV_FILE if csv_file != CSV_FILE else None
+    if ENGINE == "columnar":
+        return ColumnarBookStore(csv_file, seed_csv=seed_csv)
+    if READ_MODE == "index":
+        if CSV_COMPRESSION != "none":
+            raise ValueError("BOOKS_READ_MODE=index não suporta CSV comprimido")
+        return IndexedBookStore(CSV_FILE)
+    if STORAGE_MODE == "journal":
+        return BookStore(
+            csv_file, journal=BookJournal(csv_file), compact_bytes=JOURNAL_COMPACT_BYTES, seed_csv=seed_csv
+        )
+    return BookStore(csv_file, seed_csv=seed_csv)
+
+_store = _build_store()
+
+_hasher = CsvHasher(_store.csv_file)
+_store.write_hooks.append(_hasher.mark_dirty)
+
+_archive_cache = ArchiveCache(ARCHIVE_CACHE_BYTES)
+
+# Todas as mutações passam pelo escritor único
+_writer = BookWriter(_store, GROUP_COMMIT_MS, GROUP_COMMIT_MAX)
+
+_query_cache = QueryCache(QUERY_CACHE_ENTRIES, QUERY_CACHE_TTL)
+
+_importer = BookImporter(IMPORT_WORKERS, IMPORT_CHUNK_ROWS)
+
+_row_cache = BookJsonCache(ROW_CACHE_ENTRIES)
+
+def _mutate(method: str, *args):
+    # As chaves do cache de consultas já incluem a versão do catálogo; limpar
+    # aqui só libera as entradas que nenhuma consulta vai acertar de novo
+    result = _writer.submit(method, *args)
+    _query_cache.clear()
+    return result
+
+MetricFunction('books_archive_cache_hits_total', 'Acertos do cache de zips', lambda: _archive_cache.hits, 'counter')
+MetricFunction('books_archive_cache_misses_total', 'Faltas do cache de zips', lambda: _archive_cache.misses, 'counter')
+MetricFunction('books_archive_cache_evictions_total', 'Zips removidos do cache', lambda: _archive_cache.evictions, 'counter')
+MetricFunction('books_archive_cache_bytes', 'Bytes ocupados pelo cache de zips', lambda: _archive_cache.size)
+MetricFunction(
+    'books_archive_cache_hit_ratio', 'Taxa de acerto do cache de zips',
+    lambda: ratio(_archive_cache.hits, _archive_cache.misses)
+)
+MetricFunction('books_hash_cache_hits_total', 'Hashes servidos sem reler o CSV', lambda: _hasher.hits, 'counter')
+MetricFunction('books_hash_cache_misses_total', 'Hashes que exigiram releitura do CSV', lambda: _hasher.misses, 'counter')
+MetricFunction('books_hash_cache_hit_ratio', 'Taxa de acerto do cache de hash', lambda: ratio(_hasher.hits, _hasher.misses))
+MetricFunction('books_query_cache_hits_total', 'Acertos do cache de consultas', lambda: _query_cache.hits, 'counter')
+MetricFunction('books_query_cache_misses_total', 'Faltas do cache de consultas', lambda: _query_cache.misses, 'counter')
+MetricFunction(
+    'books_query_cache_evictions_total', 'Consultas removidas do cache por falta de espaço',
+    lambda: _query_cache.evictions, 'counter'
+)
+MetricFunction(
+    'books_query_cache_expirations_total', 'Consultas removidas do cache por TTL',
+    lambda: _query_cache.expirations, 'counter'
+)
+MetricFunction('books_query_cache_entries', 'Consultas no cache', lambda: len(_query_cache))
+MetricFunction(
+    'books_query_cache_hit_ratio', 'Taxa de acerto do cache de consultas',
+    lambda: ratio(_query_cache.hits, _query_cache.misses)
+)
+MetricFunction('books_row_cache_hits_total', 'Livros servidos com o JSON do cache de linhas', lambda: _row_cache.hits, 'counter')
+MetricFunction('books_row_cache_misses_total', 'Livros serializados de novo', lambda: _row_cache.misses, 'counter')
+MetricFunction(
+    'books_row_cache_evictions_total', 'Livros removidos do cache de linhas por falta de espaço',
+    lambda: _row_cache.evictions, 'counter'
+)
+MetricFunction('books_row_cache_entries', 'Livros no cache de linhas', lambda: len(_row_cache))
+MetricFunction(
+    'books_row_cache_hit_ratio', 'Taxa de acerto do cache de linhas',
+    lambda: ratio(_row_cache.hits, _row_cache.misses)
+)
+MetricFunction('books_write_batches_total', 'Lotes gravados pelo escritor único', lambda: _writer.batches, 'counter')
+MetricFunction('books_write_operations_total', 'Mutações gravadas pelo escritor único', lambda: _writer.operations, 'counter')
+
+def validate_books(items):
+    # Valida cada item do lote isoladamente, devolvendo os livros válidos com
+    # sua posição e a lista de erros por item
+    books = []
+    errors = []
+    started = time.perf_counter()
+    for index, item in enumerate(items):
+        try:
+            book = Book(**item)
+        except ValidationError as e:
+            errors.append({"index": index, "id": error_id(item.get("id")), "detail": validation_detail(e)})
+            continue
+        books.append((index, book))
+    record_validation(time.perf_counter() - started, len(items))
+    return books, errors
+
+def _bulk_result(books, results, errors, failure: str):
+    succeeded = []
+    for (index, book), result in zip(books, results):
+        if result:
+            succeeded.append(book.id)
+        else:
+            errors.append({"index": index, "id": book.id, "detail": failure.format(id=book.id)})
+    errors.sort(key=lambda error: error["index"])
+    return {"succeeded": succeeded, "errors": errors}
+
+def _range(low: int, high: int):
+    return None if low is None and high is None else (low, high)
+
+def _digest(value):
+    return hashlib.blake2b(repr(value).encode(), digest_size=8).hexdigest()
+
+def _encode_cursor(position: int, generation: str):
+    data = json.dumps({"p": position, "g": generation}).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+def _decode_cursor(cursor: str, generation: str):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        position = int(data["p"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido")
+    if data.get("g") != generation or position < 0:
+        raise ValueError("Cursor expirado")
+    return position
 
 class BookService:
     CSV_FILE = CSV_FILE
 
     @staticmethod
-    def read_books():
-        books = []
-        if os.path.exists(CSV_FILE):
-            df = pd.read_csv(CSV_FILE)
-            for _, row in df.iterrows():
-                books.append(Book(**row.to_dict()))
-        return books
+    def load():
+        _store.load()
 
     @staticmethod
-    def write_books(books):
-        with open(CSV_FILE, mode='w', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=['id', 'title', 'author', 'year', 'genre', 'pages'])
-            writer.writeheader()
-            for book in books:
-                writer.writerow(book.dict())
+    def compact():
+        _store.compact()
+
+    @staticmethod
+    def catalog_etag():
+        return f'"{_INSTANCE}-{_digest(_store.version())}"'
+
+    @staticmethod
+    def file_hash():
+        _store.synced_csv()
+        return _hasher.digest()
+
+    @staticmethod
+    def compressed_download():
+        # Nome e tipo de mídia do download quando o CSV já fica comprimido em
+        # disco; None quando o download precisa montar o zip
+        compression = compression_of(_store.csv_file)
+        if compression == "none":
+            return None
+        suffix, media_type = COMPRESSIONS[compression]
+        return os.path.basename(CSV_FILE) + suffix, media_type
+
+    @staticmethod
+    def stream_compressed():
+        # Serve os bytes comprimidos do próprio arquivo, sem recompactar
+        with open(_store.synced_csv(), 'rb') as file:
+            while chunk := file.read(EXPORT_CHUNK_BYTES):
+                yield chunk
+
+    @staticmethod
+    def cached_archive():
+        hash_value, _ = BookService.file_hash()
+        return _archive_cache.get(hash_value)
+
+    @staticmethod
+    def stream_archive():
+        hash_value, _ = BookService.file_hash()
+        parts = []
+        collected = 0
+        for chunk in stream_zip(_store.csv_file, os.path.basename(CSV_FILE)):
+            if parts is not None:
+                parts.append(chunk)
+                collected += len(chunk)
+                if collected > _archive_cache.max_bytes:
+                    parts = None
+            yield chunk
+        # Só guarda no cache se o CSV não mudou enquanto era compactado
+        if parts is not None and _hasher.digest()[0] == hash_value:
+            _archive_cache.put(hash_value, b''.join(parts))
+
+    @staticmethod
+    def count_books(title: str = None, author: str = None, year: int = None, genre: str = None):
+        return _store.count(title, author, year, genre)
+
+    @staticmethod
+    def count_breakdown():
+        total, genres, years = _store.count_breakdown()
+        return {"total": total, "genres": dict(genres), "years": dict(sorted(years.items()))}
+
+    @staticmethod
+    def list_books(title: str = None, author: str = None, year: int = None, genre: str = None,
+                   skip: int = 0, limit: int = 10, cursor: str = None,
+                   year_min: int = None, year_max: int = None, pages_min: int = None, pages_max: int = None,
+                   sort_by: str = None, order: str = "asc"):
+        # Retorna a página e o cursor da próxima (ou None); levanta ValueError
+        # se o cursor for inválido ou estiver expirado. Uma faixa sem
+        # `sort_by` ordena pelo próprio campo da faixa. `skip` só vale para a
+        # primeira página: o cursor já aponta para depois dos registros pulados.
+        if limit <= 0:
+            return [], None
+        if cursor:
+            skip = 0
+        year_range = _range(year_min, year_max)
+        pages_range = _range(pages_min, pages_max)
+        if sort_by is None and (year_range or pages_range):
+            sort_by = 'year' if year_range else 'pages'
+        generation = _digest(_store.cursor_generation(sort_by))
+        position = _decode_cursor(cursor, generation) if cursor else None
+        books, next_position = _store.page(
+            title, author, year, genre, position, skip, limit, year_range, pages_range, sort_by, order == "desc"
+        )
+        next_cursor = _encode_cursor(next_position, generation) if next_position is not None else None
+        return books, next_cursor
+
+    @staticmethod
+    def list_books_json(title: str = None, author: str = None, year: int = None, genre: str = None,
+                        skip: int = 0, limit: int = 10, cursor: str = None,
+                        year_min: int = None, year_max: int = None, pages_min: int = None, pages_max: int = None,
+                        sort_by: str = None, order: str = "asc"):
+        # Como list_books, mas devolve a página já serializada em JSON e passa
+        # pelo cache de consultas
+        key = QueryCache.key(
+            _store.version(), title, author, year, genre, 0 if cursor else skip, limit, cursor,
+            _range(year_min, year_max), _range(pages_min, pages_max), sort_by, order == "desc"
+        )
+        cached = _query_cache.get(key)
+        if cached is not None:
+            return cached
+        books, next_cursor = BookService.list_books(
+            title, author, year, genre, skip, limit, cursor, year_min, year_max, pages_min, pages_max, sort_by, order
+        )
+        body = _row_cache.join(books)
+        _query_cache.put(key, (body, next_cursor))
+        return body, next_cursor
+
+    @staticmethod
+    def book_json(book: Book):
+        return _row_cache.get(book)
+
+    @staticmethod
+    def export_ndjson():
+        batch = []
+        for _, row in scan_csv(_store.synced_csv()):
+            batch.append(json.dumps({
+                'id': int(row[0]), 'title': row[1], 'author': row[2],
+                'year': int(row[3]), 'genre': row[4], 'pages': int(row[5]),
+            }, ensure_ascii=False))
+            if len(batch) == EXPORT_BATCH_ROWS:
+                yield '\n'.join(batch) + '\n'
+                batch = []
+        if batch:
+            yield '\n'.join(batch) + '\n'
+
+    @staticmethod
+    def export_csv():
+        with open_csv(_store.synced_csv()) as file:
+            while chunk := file.read(EXPORT_CHUNK_BYTES):
+                yield chunk
+
+    @staticmethod
+    def import_csv(file):
+        # Valida o CSV em blocos no pool de processos e grava os válidos em um
+        # único commit; ids já existentes são recusados pelo índice de ids do
+        # armazenamento
+        books = []
+        errors = []
+        seen = set()
+        for chunk_books, chunk_errors in _importer.validate(file):
+            errors += chunk_errors
+            for line, book in chunk_books:
+                if book.id in seen:
+                    errors.append({"line": line, "id": book.id, "detail": f"ID {book.id} repetido no arquivo"})
+                    continue
+                seen.add(book.id)
+                books.append((line, book))
+        results = _mutate('add_many', [book for _, book in books]) if books else []
+        imported = 0
+        for (line, book), added in zip(books, results):
+            if added:
+                imported += 1
+            else:
+                errors.append({"line": line, "id": book.id, "detail": f"Livro com ID {book.id} já existe"})
+        errors.sort(key=lambda error: error["line"])
+        return {"imported": imported, "errors": errors}
 
     @staticmethod
     def get_book(book_id: int):
-        books = BookService.read_books()
-        for book in books:
-            if book.id == book_id:
-                return book
-        return None
+        return _store.get(book_id)
 
     @staticmethod
     def create_book(book: Book):
-        books = BookService.read_books()
-        if any(b.id == book.id for b in books):
-            return False
-        books.append(book)
-        BookService.write_books(books)
-        return True
+        return _mutate('add', book)
 
     @staticmethod
     def update_book(book_id: int, updated_book: Book):
-        books = BookService.read_books()
-        for i, book in enumerate(books):
-            if book.id == book_id:
-                books[i] = updated_book
-                BookService.write_books(books)
-                return updated_book
-        return None
+        return _mutate('replace', book_id, updated_book)
 
     @staticmethod
     def delete_book(book_id: int):
-        books = BookService.read_books()
-        for i, book in enumerate(books):
-            if book.id == book_id:
-                deleted_book = books.pop(i)
-                BookService.write_books(books)
-                return deleted_book
-        return None
\ No newline at end of file
+        return _mutate('remove', book_id)
+
+    @staticmethod
+    def create_books(items):
+        books, errors = validate_books(items)
+        results = _mutate('add_many', [book for _, book in books])
+        return _bulk_result(books, results, errors, "Livro com ID {id} já existe")
+
+    @staticmethod
+    def update_books(items):
+        books, errors = validate_books(items)
+        results = _mutate('replace_many', [book for _, book in books])
+        return _bulk_result(books, results, errors, "Livro com ID {id} não encontrado")
+
+    @staticmethod
+    def delete_books(book_ids):
+        results = _mutate('remove_many', book_ids)
+        succeeded = [book.id for book in results if book is not None]
+        errors = [
+            {"index": index, "id": book_id, "detail": f"Livro com ID {book_id} não encontrado"}
+            for index, (book_id, book) in enumerate(zip(book_ids, results)) if book is None
+        ]
+        return {"succeeded": succeeded, "errors": errors}
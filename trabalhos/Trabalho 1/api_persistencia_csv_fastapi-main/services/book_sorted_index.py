@@ -0,0 +1,126 @@
+from bisect import bisect_left, insort
+from models.book import Book
+
+SORTED_FIELDS = ('year', 'pages')
+# A partir de quantas mudanças num lote vale mais refazer as listas (filtrar e
+# reordenar, O(n)) do que inserir e remover uma a uma (um memmove O(n) cada)
+BATCH_REBUILD = 1024
+
+# Índices secundários ordenados por ano e por páginas: para cada campo, uma
+# lista ordenada de chaves (valor, ordem no catálogo, id). Faixas viram dois
+# bisect e uma fatia, então faixa + paginação custa O(log n + k). Empates
+# seguem a ordem do catálogo; a ordem decrescente é o inverso exato da
+# crescente. É mantido pelo BookStore a cada carga e mutação; com uma
+# `sequence`, a ordem do catálogo é a posição global do id nela.
+class BookSortedIndex:
+    def __init__(self, sequence=None):
+        self._keys = {field: [] for field in SORTED_FIELDS}
+        self._books = {}
+        self._order = {}
+        self._next_order = 0
+        self._sequence = sequence
+
+    def on_reset(self, books):
+        self.__init__(self._sequence)
+        for book in books:
+            self._books[book.id] = book
+            self._order[book.id] = self._new_order(book.id)
+        for field, keys in self._keys.items():
+            keys.extend(self._key(field, book) for book in self._books.values())
+            keys.sort()
+
+    def _new_order(self, book_id: int):
+        if self._sequence is not None:
+            return self._sequence[book_id]
+        order = self._next_order
+        self._next_order += 1
+        return order
+
+    def on_upsert(self, old_book, new_book: Book):
+        if old_book is None:
+            order = self._new_order(new_book.id)
+        else:
+            order = self._order[old_book.id]
+            self._unindex(old_book)
+        self._books[new_book.id] = new_book
+        self._order[new_book.id] = order
+        for field, keys in self._keys.items():
+            insort(keys, self._key(field, new_book))
+
+    def on_upsert_many(self, changes):
+        # Lotes grandes (bulk, importação) trocam k inserções O(n) por uma
+        # filtragem das chaves antigas e uma ordenação que o timsort resolve
+        # juntando a lista já ordenada com as chaves novas
+        changes = list(changes)
+        if len(changes) < BATCH_REBUILD:
+            for old_book, new_book in changes:
+                self.on_upsert(old_book, new_book)
+            return
+        stale = {}
+        for old_book, new_book in changes:
+            if old_book is None:
+                self._order[new_book.id] = self._new_order(new_book.id)
+            else:
+                stale.setdefault(old_book.id, old_book)
+            self._books[new_book.id] = new_book
+        fresh = dict.fromkeys(new_book.id for _, new_book in changes)
+        for field, keys in self._keys.items():
+            removed = {self._key(field, book) for book in stale.values()}
+            if removed:
+                keys[:] = [key for key in keys if key not in removed]
+            keys.extend(self._key(field, self._books[book_id]) for book_id in fresh)
+            keys.sort()
+
+    def on_delete(self, book: Book):
+        self._unindex(book)
+
+    def on_delete_many(self, books):
+        books = list(books)
+        if len(books) < BATCH_REBUILD:
+            for book in books:
+                self._unindex(book)
+            return
+        for field, keys in self._keys.items():
+            removed = {self._key(field, book) for book in books}
+            keys[:] = [key for key in keys if key not in removed]
+        for book in books:
+            del self._books[book.id]
+            del self._order[book.id]
+
+    def _key(self, field: str, book: Book):
+        return (getattr(book, field), self._order[book.id], book.id)
+
+    def _unindex(self, book: Book):
+        for field, keys in self._keys.items():
+            key = self._key(field, book)
+            del keys[bisect_left(keys, key)]
+        del self._books[book.id]
+        del self._order[book.id]
+
+    def _bounds(self, field: str, low: int = None, high: int = None):
+        keys = self._keys[field]
+        start = 0 if low is None else bisect_left(keys, (low,))
+        end = len(keys) if high is None else bisect_left(keys, (high + 1,))
+        return start, max(start, end)
+
+    def size(self, field: str, low: int = None, high: int = None):
+        start, end = self._bounds(field, low, high)
+        return end - start
+
+    def scan(self, field: str, low: int = None, high: int = None, descending: bool = False, offset: int = 0):
+        # Gera os ids com valor em [low, high] na ordem pedida, começando do
+        # `offset`-ésimo, sem copiar a faixa
+        keys = self._keys[field]
+        start, end = self._bounds(field, low, high)
+        if descending:
+            positions = range(end - 1 - offset, start - 1, -1)
+        else:
+            positions = range(start + offset, end)
+        return (keys[i][2] for i in positions)
+
+    def sort(self, field: str, book_ids, descending: bool = False):
+        # Ordena um conjunto pequeno de ids pela mesma chave do índice
+        ids = sorted(book_ids, key=lambda book_id: self._key(field, self._books[book_id]))
+        if descending:
+            ids.reverse()
+        return ids
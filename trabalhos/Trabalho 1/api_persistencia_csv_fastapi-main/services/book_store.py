@@ -0,0 +1,375 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
+import pandas as pd
+from models.book import Book
+from services.book_counter import BookCounter
+from services.book_search_index import BookSearchIndex
+from services.book_sorted_index import BookSortedIndex
+from services.metrics import STORE_SECONDS, record_full_read, record_validation
+from services.request_stats import add_rows, timed
+from services.storage_engine import (
+    StorageEngine, convert_csv, in_bounds, is_validated, mark_validated, read_trusted, write_csv,
+)
+
+# Livros mantidos em memória, indexados por id. O CSV só é relido quando
+# o mtime ou o tamanho mudam. Mutações alteram a memória sob `lock` e gravam
+# o CSV novo depois de soltá-la, então leituras não esperam pelo disco.
+# Com um journal, cada mutação vira um registro anexado ao log em vez de
+# uma reescrita do CSV, e o log é compactado no CSV ao passar do limite.
+# Índices secundários se registram em `listeners` para acompanhar cargas
+# (on_reset) e mutações (on_upsert/on_delete e suas versões em lote
+# on_upsert_many/on_delete_many); o índice de trigramas, os
+# contadores e os índices ordenados respondem às consultas sem percorrer o
+# catálogo. Um CSV com o marcador de geração validada (gravado pelo próprio
+# serviço) é carregado sem passar pelo pydantic; editado fora da API, é
+# validado por inteiro e marcado. Com `seed_csv`, a primeira carga converte
+# aquele CSV para o formato de `csv_file` (por exemplo, books.csv para
+# books.csv.gz). Como shard, recebe a `sequence` global do catálogo e mantém
+# livros e índices na ordem dela.
+class BookStore(StorageEngine):
+    def __init__(self, csv_file: str, journal=None, compact_bytes: int = 0, seed_csv: str = None, sequence=None):
+        super().__init__()
+        self.csv_file = csv_file
+        self.seed_csv = seed_csv
+        self.journal = journal
+        self.compact_bytes = compact_bytes
+        self._books = {}
+        self._signature = None
+        self.sequence = sequence
+        self.search_index = BookSearchIndex(sequence)
+        self.counter = BookCounter()
+        self.sorted_index = BookSortedIndex(sequence)
+        self.listeners = [self.search_index, self.counter, self.sorted_index]
+        self.lock = threading.RLock()
+        self._file_lock = threading.Lock()
+        self._snapshot = None
+        self._batch_thread = None
+        self._pending = None
+        self._version = 0
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.csv_file)
+        except FileNotFoundError:
+            csv_signature = None
+        else:
+            csv_signature = (stat.st_mtime_ns, stat.st_size)
+        if self.journal is None:
+            return csv_signature
+        return (csv_signature, self.journal.signature())
+
+    def load(self):
+        with self.lock, STORE_SECONDS.time('load'):
+            if self.seed_csv:
+                convert_csv(self.seed_csv, self.csv_file)
+            books = {}
+            if os.path.exists(self.csv_file):
+                started = time.perf_counter()
+                if is_validated(self.csv_file):
+                    # Gravado pelo próprio serviço: carrega sem revalidar
+                    with timed('parse_ms'):
+                        books = {book.id: book for book in read_trusted(self.csv_file)}
+                    rows = len(books)
+                else:
+                    validation = 0.0
+                    with timed('parse_ms'):
+                        df = pd.read_csv(self.csv_file)
+                        for _, row in df.iterrows():
+                            fields = row.to_dict()
+                            validation_started = time.perf_counter()
+                            book = Book(**fields)
+                            validation += time.perf_counter() - validation_started
+                            books[book.id] = book
+                    rows = len(df)
+                    record_validation(validation, rows)
+                    mark_validated(self.csv_file)
+                record_full_read(time.perf_counter() - started, os.path.getsize(self.csv_file), rows)
+            if self.journal is not None:
+                with timed('parse_ms'):
+                    self.journal.replay(books)
+            add_rows(len(books))
+            self._books = self._in_sequence(books)
+            self._snapshot = None
+            self._signature = self._file_signature()
+            self._notify('on_reset', books.values())
+
+    def refresh(self):
+        with self.lock:
+            # Durante uma gravação o arquivo muda pelas mãos do próprio serviço
+            if self._file_signature() != self._signature and not self._file_lock.locked():
+                self.load()
+
+    def _in_sequence(self, books: dict, start: int = 0):
+        # Com uma sequência global, o dicionário segue as posições dela. Só
+        # uma troca de id entre shards (ou o replay de uma) põe um livro fora
+        # de ordem; confere a partir de `start` e só então reordena
+        if self.sequence is None:
+            return books
+        keys = list(islice(books, max(start - 1, 0), None))
+        positions = [self.sequence[book_id] for book_id in keys]
+        if all(a < b for a, b in zip(positions, positions[1:])):
+            return books
+        return dict(sorted(books.items(), key=lambda item: self.sequence[item[0]]))
+
+    def _notify(self, event: str, *args):
+        self._version += 1
+        for listener in self.listeners:
+            getattr(listener, event)(*args)
+
+    def _flush(self):
+        if self._pending is not None:
+            self._pending.clear()
+        if self.journal is None:
+            # Só guarda o retrato do catálogo; a gravação sai em
+            # _write_snapshot, depois que a trava de memória é solta
+            self._snapshot = list(self._books.values())
+            return
+        self._before_write(0)
+        write_csv(self.csv_file, self._books.values())
+        self.journal.truncate()
+        self._signature = self._file_signature()
+
+    def _write_snapshot(self):
+        # Grava o retrato mais recente sob a trava de arquivo, sem segurar a
+        # de memória: leituras continuam enquanto o CSV novo é montado ao lado.
+        # Um retrato substituído antes de ser gravado está contido no seguinte.
+        if self._batch_thread == threading.get_ident():
+            return
+        with self._file_lock:
+            with self.lock:
+                books, self._snapshot = self._snapshot, None
+            if books is None:
+                return
+            with STORE_SECONDS.time('write_snapshot'):
+                self._before_write(0)
+                write_csv(self.csv_file, books)
+            with self.lock:
+                self._signature = self._file_signature()
+
+    @contextmanager
+    def _writing(self):
+        # Mutação: altera memória e índices sob a trava e grava depois dela
+        with self.lock:
+            yield
+        self._write_snapshot()
+
+    def _commit(self, upserts=(), deletes=()):
+        if self._pending is not None:
+            # Dentro de um lote só anota os ids tocados; o commit sai no fim
+            self._pending.update(dict.fromkeys(book.id for book in upserts))
+            self._pending.update(dict.fromkeys(deletes))
+            return
+        if self.journal is None:
+            self._flush()
+            return
+        self.journal.record(upserts=upserts, deletes=deletes)
+        if self.journal.size() > self.compact_bytes:
+            self._flush()
+        else:
+            self._signature = self._file_signature()
+
+    @contextmanager
+    def batch(self, write: bool = True):
+        # Grava o estado final dos ids tocados no lote com um único commit.
+        # Com write=False o CSV fica para quem chamou gravar com
+        # _write_snapshot(), depois de soltar as próprias travas
+        with self.lock:
+            if self._pending is not None:
+                yield
+                return
+            self._pending = {}
+            self._batch_thread = threading.get_ident()
+            try:
+                yield
+            finally:
+                pending, self._pending = self._pending, None
+                self._batch_thread = None
+                if pending:
+                    self._commit(
+                        upserts=[self._books[book_id] for book_id in pending if book_id in self._books],
+                        deletes=[book_id for book_id in pending if book_id not in self._books],
+                    )
+        if write:
+            self._write_snapshot()
+
+    def compact(self):
+        with self.lock:
+            if self.journal is None or self.journal.size() == 0:
+                return
+            self.refresh()
+            self._flush()
+
+    def synced_csv(self):
+        self.compact()
+        return self.csv_file
+
+    def version(self):
+        with self.lock:
+            self.refresh()
+            return self._version
+
+    def all(self):
+        with self.lock:
+            self.refresh()
+            return list(self._books.values())
+
+    def iter_books(self):
+        # Percorre o catálogo sem copiá-lo; quem chama impede mutações até
+        # terminar (o ShardedBookStore segura a própria trava)
+        self.refresh()
+        return iter(self._books.values())
+
+    def get(self, book_id: int):
+        with self.lock:
+            self.refresh()
+            return self._books.get(book_id)
+
+    def count(self, title: str = None, author: str = None, year: int = None, genre: str = None):
+        with self.lock:
+            self.refresh()
+            if title or author:
+                return len(self.search_index.search(title, author, year, genre, ordered=False))
+            return self.counter.count(year, genre)
+
+    def count_breakdown(self):
+        with self.lock:
+            self.refresh()
+            return self.counter.total, dict(self.counter.genres), dict(self.counter.years)
+
+    def _sorted_ids(self, title: str, author: str, year: int, genre: str, year_range, pages_range,
+                    sort_by: str, descending: bool, start: int, limit: int):
+        # Percorre o índice ordenado do campo de ordenação (ou da faixa pedida)
+        # a partir de `start`, aplicando os demais filtros sobre ele
+        field = sort_by or ('year' if year_range else 'pages')
+        bounds = {'year': year_range or (None, None), 'pages': pages_range or (None, None)}
+        low, high = bounds[field]
+        other = 'pages' if field == 'year' else 'year'
+        filtered = title or author or year or genre
+        if not filtered and bounds[other] == (None, None):
+            return self.sorted_index.scan(field, low, high, descending, start)
+        size = self.sorted_index.size(field, low, high)
+        # Percorrer a faixa filtrando custa cerca de needed * size / m passos
+        # quando m dos `size` livros passam no filtro; montar e ordenar os m
+        # candidatos custa ao menos m. Páginas rasas percorrem o índice e param
+        # no último livro da página; só filtros muito seletivos (ou páginas
+        # fundas) compensam ordenar os candidatos
+        needed = start + limit + 1
+
+        def worth_sorting(matches: int):
+            return matches * matches < needed * size
+
+        candidates = self.search_index.search(title, author, year, genre, ordered=False) if filtered else None
+        if bounds[other] != (None, None) and worth_sorting(self.sorted_index.size(other, *bounds[other])):
+            # A faixa do outro campo é seletiva: vira conjunto de candidatos
+            in_other = set(self.sorted_index.scan(other, *bounds[other]))
+            candidates = in_other if candidates is None else in_other.intersection(candidates)
+
+        def accept(book_id):
+            if candidates is not None and book_id not in candidates:
+                return False
+            return in_bounds(getattr(self._books[book_id], other), bounds[other])
+
+        if candidates is not None and worth_sorting(len(candidates)):
+            ids = [
+                book_id for book_id in candidates
+                if in_bounds(getattr(self._books[book_id], field), bounds[field]) and accept(book_id)
+            ]
+            return islice(self.sorted_index.sort(field, ids, descending), start, None)
+        return islice(filter(accept, self.sorted_index.scan(field, low, high, descending)), start, None)
+
+    def page(self, title: str, author: str, year: int, genre: str, position, skip: int, limit: int,
+             year_range=None, pages_range=None, sort_by: str = None, descending: bool = False):
+        # A posição é o índice na sequência de resultados
+        with self.lock:
+            self.refresh()
+            start = (position or 0) + skip
+            if sort_by or year_range or pages_range:
+                ids = self._sorted_ids(
+                    title, author, year, genre, year_range, pages_range, sort_by, descending, start, limit
+                )
+                page = list(islice(ids, limit + 1))
+            else:
+                if title or author or year or genre:
+                    ids = self.search_index.search(title, author, year, genre)
+                else:
+                    ids = iter(self._books)
+                page = list(islice(ids, start, start + limit + 1))
+            add_rows(len(page))
+            books = [self._books[book_id] for book_id in page[:limit]]
+        return books, (start + limit if len(page) > limit else None)
+
+    def add_many(self, books):
+        with self._writing():
+            self.refresh()
+            results = []
+            added = []
+            size = len(self._books)
+            for book in books:
+                if book.id in self._books:
+                    results.append(False)
+                    continue
+                self._books[book.id] = book
+                added.append(book)
+                results.append(True)
+            if added:
+                self._books = self._in_sequence(self._books, size)
+                self._commit(upserts=added)
+                self._notify('on_upsert_many', [(None, book) for book in added])
+            return results
+
+    def replace(self, book_id: int, updated_book: Book):
+        with self._writing():
+            self.refresh()
+            old_book = self._books.get(book_id)
+            if old_book is None:
+                return None
+            if updated_book.id == book_id:
+                self._books[book_id] = updated_book
+                self._commit(upserts=[updated_book])
+            else:
+                if updated_book.id in self._books:
+                    raise ValueError(f"Livro com ID {updated_book.id} já existe")
+                self._books = {
+                    (updated_book.id if key == book_id else key): (updated_book if key == book_id else book)
+                    for key, book in self._books.items()
+                }
+                self._commit(upserts=[updated_book], deletes=[book_id])
+            self._notify('on_upsert', old_book, updated_book)
+            return updated_book
+
+    def replace_many(self, books):
+        with self._writing():
+            self.refresh()
+            results = []
+            updated = []
+            for book in books:
+                old_book = self._books.get(book.id)
+                if old_book is None:
+                    results.append(None)
+                    continue
+                self._books[book.id] = book
+                updated.append((old_book, book))
+                results.append(book)
+            if updated:
+                self._commit(upserts=[book for _, book in updated])
+                self._notify('on_upsert_many', updated)
+            return results
+
+    def remove_many(self, book_ids):
+        with self._writing():
+            self.refresh()
+            results = [self._books.pop(book_id, None) for book_id in book_ids]
+            removed = [book for book in results if book is not None]
+            if removed:
+                self._commit(deletes=[book.id for book in removed])
+                self._notify('on_delete_many', removed)
+            return results
+
+    def replace_all(self, books):
+        with self._writing():
+            self._books = {book.id: book for book in books}
+            self._flush()
+            self._notify('on_reset', self._books.values())
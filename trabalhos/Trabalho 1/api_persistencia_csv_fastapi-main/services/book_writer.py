@@ -0,0 +1,94 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from services.request_stats import RequestStats, bind_stats, current_stats, unbind_stats
+
+# Fila de escritor único com group commit: as mutações enviadas por threads
+# concorrentes entram em uma fila, e a thread escritora aplica tudo o que
+# chegou dentro da janela em um único `store.batch()`, ou seja, em um só
+# ciclo de aplicação e gravação. Cada chamador recebe o próprio resultado
+# (ou exceção) só depois que o lote inteiro foi gravado; se a gravação
+# falha, o lote é desfeito no mecanismo e todos recebem o erro. O tempo de
+# parse e gravação do lote entra nas estatísticas de cada requisição dele.
+class BookWriter:
+    def __init__(self, store, window_ms: float, max_batch: int):
+        self.store = store
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.operations = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="book-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, method: str, *args):
+        # Executa store.<method>(*args) no próximo lote e espera o resultado
+        self._ensure_started()
+        future = Future()
+        self._queue.put((method, args, future, current_stats()))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _rollback(self):
+        # As mutações do lote já estão na memória do mecanismo e iriam para o
+        # disco com o próximo lote: volta ao catálogo gravado antes de avisar
+        # os chamadores da falha
+        try:
+            self.store.rollback()
+        except Exception as e:
+            logging.error("Falha ao recarregar o catálogo após o lote: %s", e)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            outcomes = []
+            failure = None
+            batch_stats = RequestStats()
+            token = bind_stats(batch_stats)
+            try:
+                with self.store.batch():
+                    for method, args, future, _ in batch:
+                        try:
+                            outcomes.append((future, getattr(self.store, method)(*args), None))
+                        except Exception as e:
+                            outcomes.append((future, None, e))
+            except Exception as e:
+                logging.error("Falha ao gravar o lote de %d mutações: %s", len(batch), e)
+                failure = e
+                self._rollback()
+            finally:
+                unbind_stats(token)
+            for _, _, _, stats in batch:
+                if stats is not None:
+                    stats.merge(batch_stats)
+            if failure is not None:
+                for _, _, future, _ in batch:
+                    future.set_exception(failure)
+                continue
+            self.batches += 1
+            self.operations += len(batch)
+            for future, result, error in outcomes:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,391 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from models.book import Book
+from services.metrics import STORE_SECONDS, record_full_read
+from services.request_stats import add_rows, timed
+from services.storage_engine import (
+    FIELDNAMES, StorageEngine, convert_csv, is_validated, mark_validated, read_rows, row_to_book, write_csv,
+)
+
+# Pool de strings internadas: cada valor distinto é guardado uma única vez e
+# as colunas guardam só o código (int32) dele
+class StringPool:
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value: str):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def matching(self, text: str):
+        # Tabela booleana por código: o valor contém `text`, sem diferenciar
+        # maiúsculas. A busca roda uma vez por valor distinto, não por livro.
+        text = text.lower()
+        return np.fromiter((text in value.lower() for value in self.values), dtype=bool, count=len(self.values))
+
+# Catálogo em colunas: id, ano e páginas em arrays NumPy; gênero e autor
+# codificados por dicionário e títulos em um pool de strings internadas. Os
+# filtros viram máscaras vetorizadas sobre as colunas e os livros só são
+# montados como `Book` ao sair na resposta. Persiste no mesmo CSV do
+# mecanismo `csv`, regravado a cada mutação (ou uma vez por lote) fora da
+# trava de memória.
+class ColumnarBookStore(StorageEngine):
+    def __init__(self, csv_file: str, seed_csv: str = None):
+        super().__init__()
+        self.csv_file = csv_file
+        self.seed_csv = seed_csv
+        self._reset_columns()
+        self._signature = None
+        self._version = 0
+        self._batch_thread = None
+        self._dirty = False
+        self._snapshot = None
+        self.lock = threading.RLock()
+        self._file_lock = threading.Lock()
+
+    def _reset_columns(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.years = np.empty(0, dtype=np.int64)
+        self.pages = np.empty(0, dtype=np.int64)
+        self.titles = np.empty(0, dtype=np.int32)
+        self.authors = np.empty(0, dtype=np.int32)
+        self.genres = np.empty(0, dtype=np.int32)
+        self.title_pool = StringPool()
+        self.author_pool = StringPool()
+        self.genre_pool = StringPool()
+        self._id_order = None
+        self._sorted_ids = None
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.csv_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _set_columns(self, ids, titles, authors, years, genres, pages):
+        self.ids = np.array(ids, dtype=np.int64)
+        self.titles = np.array(titles, dtype=np.int32)
+        self.authors = np.array(authors, dtype=np.int32)
+        self.years = np.array(years, dtype=np.int64)
+        self.genres = np.array(genres, dtype=np.int32)
+        self.pages = np.array(pages, dtype=np.int64)
+        self._id_order = None
+        self._sorted_ids = None
+
+    def _encode(self, books):
+        # Colunas (em listas) de uma sequência de livros
+        columns = ([], [], [], [], [], [])
+        for book in books:
+            columns[0].append(book.id)
+            columns[1].append(self.title_pool.intern(book.title))
+            columns[2].append(self.author_pool.intern(book.author))
+            columns[3].append(book.year)
+            columns[4].append(self.genre_pool.intern(book.genre))
+            columns[5].append(book.pages)
+        return columns
+
+    def load(self):
+        with self.lock, STORE_SECONDS.time('load'):
+            if self.seed_csv:
+                convert_csv(self.seed_csv, self.csv_file)
+            self._reset_columns()
+            if os.path.exists(self.csv_file):
+                started = time.perf_counter()
+                trusted = is_validated(self.csv_file)
+                columns = ([], [], [], [], [], [])
+                with timed('parse_ms'):
+                    for row in read_rows(self.csv_file):
+                        if not trusted:
+                            # Editado fora da API: valida a linha antes de aceitá-la
+                            book = row_to_book(row)
+                            row = [getattr(book, field) for field in FIELDNAMES]
+                        columns[0].append(int(row[0]))
+                        columns[1].append(self.title_pool.intern(row[1]))
+                        columns[2].append(self.author_pool.intern(row[2]))
+                        columns[3].append(int(row[3]))
+                        columns[4].append(self.genre_pool.intern(row[4]))
+                        columns[5].append(int(row[5]))
+                self._set_columns(*columns)
+                if not trusted:
+                    mark_validated(self.csv_file)
+                record_full_read(time.perf_counter() - started, os.path.getsize(self.csv_file), len(self.ids))
+            add_rows(len(self.ids))
+            self._signature = self._file_signature()
+            self._snapshot = None
+            self._version += 1
+
+    def refresh(self):
+        with self.lock:
+            # Durante uma gravação o arquivo muda pelas mãos do próprio serviço
+            if self._file_signature() != self._signature and not self._file_lock.locked():
+                self.load()
+
+    def _columns(self):
+        return (
+            self.ids, self.titles, self.authors, self.years, self.genres, self.pages,
+            self.title_pool.values, self.author_pool.values, self.genre_pool.values,
+        )
+
+    @staticmethod
+    def _materialize(columns, row: int):
+        ids, titles, authors, years, genres, pages, title_values, author_values, genre_values = columns
+        return Book.model_construct(
+            id=int(ids[row]), title=title_values[titles[row]], author=author_values[authors[row]],
+            year=int(years[row]), genre=genre_values[genres[row]], pages=int(pages[row]),
+        )
+
+    def _book(self, row: int):
+        return self._materialize(self._columns(), row)
+
+    def _books(self, rows):
+        return [self._book(row) for row in rows]
+
+    def _id_index(self):
+        # Permutação que ordena os ids e os ids já nessa ordem. É montada na
+        # primeira busca depois de uma carga e mantida por inserções e
+        # remoções; só uma troca de id a descarta.
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids, kind='stable')
+            self._sorted_ids = self.ids[self._id_order]
+        return self._id_order, self._sorted_ids
+
+    def _row(self, book_id: int):
+        # Posição do id via busca binária sobre os ids ordenados
+        order, sorted_ids = self._id_index()
+        index = np.searchsorted(sorted_ids, book_id)
+        if index < len(sorted_ids) and sorted_ids[index] == book_id:
+            return int(order[index])
+        return None
+
+    def _flush(self):
+        # Retrato das colunas para _write_snapshot: os arrays são copiados,
+        # já que atualizações escrevem neles no lugar, e os pools só crescem
+        columns = self._columns()
+        self._snapshot = tuple(column.copy() for column in columns[:6]) + columns[6:]
+        self._dirty = False
+
+    def _write_snapshot(self):
+        # Como no BookStore: o CSV é gravado ao lado sem segurar a trava de
+        # memória, e um retrato substituído está contido no seguinte
+        if self._batch_thread == threading.get_ident():
+            return
+        with self._file_lock:
+            with self.lock:
+                columns, self._snapshot = self._snapshot, None
+            if columns is None:
+                return
+            with STORE_SECONDS.time('write_snapshot'):
+                self._before_write(0)
+                write_csv(self.csv_file, (self._materialize(columns, row) for row in range(len(columns[0]))))
+            with self.lock:
+                self._signature = self._file_signature()
+
+    @contextmanager
+    def _writing(self):
+        with self.lock:
+            yield
+        self._write_snapshot()
+
+    def _commit(self):
+        self._version += 1
+        if self._batch_thread is not None:
+            self._dirty = True
+        else:
+            self._flush()
+
+    @contextmanager
+    def batch(self):
+        with self.lock:
+            if self._batch_thread is not None:
+                yield
+                return
+            self._batch_thread = threading.get_ident()
+            try:
+                yield
+            finally:
+                self._batch_thread = None
+                if self._dirty:
+                    self._flush()
+        self._write_snapshot()
+
+    def version(self):
+        with self.lock:
+            self.refresh()
+            return self._version
+
+    def _mask(self, title: str, author: str, year: int, genre: str, year_range=None, pages_range=None):
+        mask = np.ones(len(self.ids), dtype=bool)
+        if title:
+            mask &= self.title_pool.matching(title)[self.titles]
+        if author:
+            mask &= self.author_pool.matching(author)[self.authors]
+        if year:
+            mask &= self.years == year
+        if genre:
+            mask &= self.genre_pool.matching(genre)[self.genres]
+        for column, bounds in ((self.years, year_range), (self.pages, pages_range)):
+            if bounds:
+                low, high = bounds
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+        return mask
+
+    def all(self):
+        with self.lock:
+            self.refresh()
+            add_rows(len(self.ids))
+            return self._books(range(len(self.ids)))
+
+    def get(self, book_id: int):
+        with self.lock:
+            self.refresh()
+            row = self._row(book_id)
+            return None if row is None else self._book(row)
+
+    def count(self, title: str = None, author: str = None, year: int = None, genre: str = None):
+        with self.lock:
+            self.refresh()
+            return int(self._mask(title, author, year, genre).sum())
+
+    def count_breakdown(self):
+        with self.lock:
+            self.refresh()
+            genre_counts = np.bincount(self.genres, minlength=len(self.genre_pool))
+            genres = {
+                self.genre_pool.values[code]: int(count) for code, count in enumerate(genre_counts) if count
+            }
+            years, year_counts = np.unique(self.years, return_counts=True)
+            return len(self.ids), genres, {int(year): int(count) for year, count in zip(years, year_counts)}
+
+    def page(self, title: str, author: str, year: int, genre: str, position, skip: int, limit: int,
+             year_range=None, pages_range=None, sort_by: str = None, descending: bool = False):
+        with self.lock:
+            self.refresh()
+            start = (position or 0) + skip
+            rows = np.flatnonzero(self._mask(title, author, year, genre, year_range, pages_range))
+            add_rows(len(self.ids))
+            if sort_by:
+                column = self.years if sort_by == 'year' else self.pages
+                rows = rows[np.argsort(column[rows], kind='stable')]
+                if descending:
+                    rows = rows[::-1]
+            page = rows[start:start + limit + 1]
+            books = self._books(page[:limit])
+        return books, (start + limit if len(page) > limit else None)
+
+    def _append(self, books):
+        start = len(self.ids)
+        columns = self._encode(books)
+        for name, values in zip(('ids', 'titles', 'authors', 'years', 'genres', 'pages'), columns):
+            current = getattr(self, name)
+            setattr(self, name, np.concatenate((current, np.array(values, dtype=current.dtype))))
+        if self._id_order is not None:
+            # Intercala os ids novos, já ordenados, no índice existente
+            new_ids = self.ids[start:]
+            order = np.argsort(new_ids, kind='stable')
+            positions = np.searchsorted(self._sorted_ids, new_ids[order])
+            self._sorted_ids = np.insert(self._sorted_ids, positions, new_ids[order])
+            self._id_order = np.insert(self._id_order, positions, order + start)
+
+    def _write_row(self, row: int, book: Book):
+        if self.ids[row] != book.id:
+            self._id_order = None
+            self._sorted_ids = None
+        self.ids[row] = book.id
+        self.titles[row] = self.title_pool.intern(book.title)
+        self.authors[row] = self.author_pool.intern(book.author)
+        self.years[row] = book.year
+        self.genres[row] = self.genre_pool.intern(book.genre)
+        self.pages[row] = book.pages
+
+    def _delete_rows(self, rows):
+        if self._id_order is not None:
+            # Tira os ids removidos do índice e desloca as linhas seguintes
+            rows = np.sort(np.asarray(rows))
+            positions = np.searchsorted(self._sorted_ids, self.ids[rows])
+            self._sorted_ids = np.delete(self._sorted_ids, positions)
+            order = np.delete(self._id_order, positions)
+            self._id_order = order - np.searchsorted(rows, order)
+        for name in ('ids', 'titles', 'authors', 'years', 'genres', 'pages'):
+            setattr(self, name, np.delete(getattr(self, name), rows))
+
+    def add_many(self, books):
+        with self._writing():
+            self.refresh()
+            results = []
+            added = []
+            seen = set()
+            for book in books:
+                if book.id in seen or self._row(book.id) is not None:
+                    results.append(False)
+                    continue
+                seen.add(book.id)
+                added.append(book)
+                results.append(True)
+            if added:
+                self._append(added)
+                self._commit()
+            return results
+
+    def replace(self, book_id: int, updated_book: Book):
+        with self._writing():
+            self.refresh()
+            row = self._row(book_id)
+            if row is None:
+                return None
+            if updated_book.id != book_id and self._row(updated_book.id) is not None:
+                raise ValueError(f"Livro com ID {updated_book.id} já existe")
+            self._write_row(row, updated_book)
+            self._commit()
+            return updated_book
+
+    def replace_many(self, books):
+        with self._writing():
+            self.refresh()
+            results = []
+            for book in books:
+                row = self._row(book.id)
+                if row is None:
+                    results.append(None)
+                    continue
+                self._write_row(row, book)
+                results.append(book)
+            if any(result is not None for result in results):
+                self._commit()
+            return results
+
+    def remove_many(self, book_ids):
+        with self._writing():
+            self.refresh()
+            results = []
+            rows = set()
+            for book_id in book_ids:
+                row = self._row(book_id)
+                if row is None or row in rows:
+                    results.append(None)
+                    continue
+                rows.add(row)
+                results.append(self._book(row))
+            if rows:
+                self._delete_rows(sorted(rows))
+                self._commit()
+            return results
+
+    def replace_all(self, books):
+        with self._writing():
+            self._reset_columns()
+            self._set_columns(*self._encode({book.id: book for book in books}.values()))
+            self._commit()
@@ -0,0 +1,74 @@
+import gzip
+import io
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Sufixo e tipo de mídia de cada formato de compressão do CSV
+COMPRESSIONS = {
+    'none': ('', 'text/csv'),
+    'gzip': ('.gz', 'application/gzip'),
+    'zstd': ('.zst', 'application/zstd'),
+}
+
+# Níveis equilibrados: o CSV é regravado a cada mutação, então a compressão
+# não pode custar mais do que o I/O que economiza
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+def compression_of(path: str):
+    for name, (suffix, _) in COMPRESSIONS.items():
+        if suffix and path.endswith(suffix):
+            return name
+    return 'none'
+
+def check_compression(compression: str):
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Compressão desconhecida: {compression}")
+    if compression == 'zstd' and zstandard is None:
+        raise RuntimeError("A compressão zstd requer o pacote zstandard")
+
+class _ZstdReader(io.RawIOBase):
+    # Leitor zstd que o BufferedReader aceita como posicionável: o seek só
+    # avança, descartando o conteúdo descomprimido até o offset pedido
+    def __init__(self, raw):
+        self._reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._reader.readinto(buffer)
+
+    def tell(self):
+        return self._reader.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._reader.seek(offset, whence)
+
+    def close(self):
+        self._reader.close()
+        super().close()
+
+# Abre o arquivo em modo binário ('rb' ou 'wb') comprimindo ou descomprimindo
+# em fluxo conforme o sufixo (ou `compression`, para arquivos temporários);
+# só o bloco corrente passa pela memória. Na leitura, offsets e seek se
+# referem ao conteúdo descomprimido.
+def open_csv(path: str, mode: str = 'rb', compression: str = None):
+    compression = compression or compression_of(path)
+    if compression == 'gzip':
+        if mode == 'wb':
+            return gzip.open(path, mode, compresslevel=GZIP_LEVEL)
+        return gzip.open(path, mode)
+    if compression == 'zstd':
+        check_compression(compression)
+        raw = open(path, mode)
+        if mode == 'wb':
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=True)
+        return io.BufferedReader(_ZstdReader(raw))
+    return open(path, mode)
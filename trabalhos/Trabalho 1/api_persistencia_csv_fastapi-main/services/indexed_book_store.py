@@ -0,0 +1,385 @@
+import csv
+import io
+import mmap
+import os
+import shutil
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import accumulate, islice
+from models.book import Book
+from services.metrics import (
+    CSV_BYTES_READ, CSV_BYTES_WRITTEN, TRUSTED_LOADS, record_full_read, record_rewrite,
+)
+from services.request_stats import add_rows, timed
+from services.storage_engine import (
+    FIELDNAMES, StorageEngine, is_validated, mark_validated, read_header, read_rows, row_matches, row_to_book, scan_file,
+    trusted_row_to_book, write_csv,
+)
+
+COPY_CHUNK = 1024 * 1024
+
+def _encode_row(book: Book):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\r\n').writerow([getattr(book, field) for field in FIELDNAMES])
+    return buffer.getvalue().encode('utf-8')
+
+def _decode_row(data: bytes, trusted: bool):
+    row = next(csv.reader(io.StringIO(data.decode('utf-8'))))
+    return trusted_row_to_book(row) if trusted else row_to_book(row)
+
+# Índice de chave primária id -> (offset, tamanho) de cada linha do CSV,
+# persistido em um arquivo ao lado (books.csv.idx) junto com o inode do CSV e
+# quantos bytes dele já estão indexados. Inserções só anexam: na carga, basta
+# indexar o que veio depois desses bytes. Uma reescrita troca o arquivo (outro
+# inode) e salva o índice de novo; sem índice salvo que valha, ele é
+# reconstruído. `trusted` indica que o CSV tem o marcador de geração
+# validada, e então as linhas viram `Book` sem revalidação.
+class BookOffsetIndex:
+    def __init__(self, csv_file: str):
+        self.csv_file = csv_file
+        self.path = csv_file + '.idx'
+        self.offsets = {}
+        self.signature = None
+        self.generation = 0
+        self.trusted = False
+
+    def file_signature(self):
+        try:
+            stat = os.stat(self.csv_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self):
+        signature = self.file_signature()
+        if signature == self.signature:
+            return
+        self.generation += 1
+        if signature is not None and read_header(self.csv_file) not in (None, FIELDNAMES):
+            # CSV editado com as colunas em outra ordem: as leituras por
+            # offset são posicionais, então ele é regravado na ordem canônica
+            write_csv(self.csv_file, [row_to_book(row) for row in read_rows(self.csv_file)])
+            signature = self.file_signature()
+        self.trusted = signature is not None and is_validated(self.csv_file)
+        if signature is None:
+            self.offsets = {}
+        elif not self._load_sidecar():
+            started = time.perf_counter()
+            self.offsets = {}
+            with timed('parse_ms'):
+                end = self._index_rows(None)
+            record_full_read(time.perf_counter() - started, end, len(self.offsets))
+            self._save_sidecar(end)
+        self.signature = signature
+
+    def _index_rows(self, offset):
+        # Indexa as linhas a partir de `offset` (None: logo após o cabeçalho)
+        # e devolve onde parou
+        with open(self.csv_file, 'rb') as file:
+            if offset is None:
+                file.readline()
+                offset = file.tell()
+            file.seek(offset)
+            pending = b''
+            for line in file:
+                pending += line
+                # Campos entre aspas podem conter quebras de linha
+                if pending.count(b'"') % 2:
+                    continue
+                if pending.strip():
+                    book_id = int(pending.split(b',', 1)[0])
+                    self.offsets[book_id] = (offset, len(pending))
+                offset += len(pending)
+                pending = b''
+        return offset
+
+    def _load_sidecar(self):
+        try:
+            stat = os.stat(self.csv_file)
+            with open(self.path, 'rb') as file:
+                header = array('q')
+                header.fromfile(file, 3)
+                inode, covered, count = header
+                if inode != stat.st_ino or covered > stat.st_size:
+                    return False
+                entries = array('q')
+                entries.fromfile(file, count * 3)
+        except (FileNotFoundError, EOFError):
+            return False
+        self.offsets = {
+            entries[i]: (entries[i + 1], entries[i + 2])
+            for i in range(0, len(entries), 3)
+        }
+        if count and not self._row_matches(entries[-3], entries[-2], entries[-1]):
+            # O arquivo foi editado no lugar: o índice salvo não vale mais
+            return False
+        if covered < stat.st_size:
+            # Linhas anexadas depois do último salvamento: indexa só a cauda
+            with timed('parse_ms'):
+                end = self._index_rows(covered)
+            CSV_BYTES_READ.inc(end - covered)
+            self._save_sidecar(end)
+        return True
+
+    def _row_matches(self, book_id: int, offset: int, length: int):
+        # A linha tem que começar logo após uma quebra de linha e pelo id
+        with open(self.csv_file, 'rb') as file:
+            file.seek(offset - 1)
+            data = file.read(length + 1)
+        return data[:1] == b'\n' and data[1:].split(b',', 1)[0] == str(book_id).encode()
+
+    def _save_sidecar(self, size: int):
+        # Grava ao lado e troca: um índice pela metade nunca fica no lugar
+        entries = array('q', [os.stat(self.csv_file).st_ino, size, len(self.offsets)])
+        for book_id, (offset, length) in self.offsets.items():
+            entries.extend((book_id, offset, length))
+        tmp_file = self.path + '.tmp'
+        with open(tmp_file, 'wb') as file:
+            entries.tofile(file)
+        os.replace(tmp_file, self.path)
+
+    def save(self):
+        self._save_sidecar(self.signature[1])
+
+    def read(self, book_id: int):
+        position = self.offsets.get(book_id)
+        if position is None:
+            return None
+        offset, length = position
+        add_rows(1)
+        CSV_BYTES_READ.inc(length)
+        with open(self.csv_file, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return _decode_row(mapped[offset:offset + length], self.trusted)
+
+# Armazenamento para catálogos grandes demais para ficar em memória: leituras
+# pontuais passam pelo índice de offsets e leem uma única linha via mmap.
+# Inserções anexam ao fim do arquivo; atualizações e remoções copiam o
+# arquivo em blocos trocando apenas as linhas afetadas, sem parsear o resto.
+# `scan` devolve as linhas cruas para que só as que passam nos filtros
+# virem `Book`, e lê só até o fim da última escrita confirmada.
+class IndexedBookStore(StorageEngine):
+    def __init__(self, csv_file: str):
+        super().__init__()
+        self.csv_file = csv_file
+        self.index = BookOffsetIndex(csv_file)
+        self._lock = threading.RLock()
+        # Serializa os escritores. Uma reescrita copia o arquivo segurando só
+        # este lock; o _lock, das leituras, fica com a troca do arquivo e dos
+        # offsets
+        self._file_lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            self.index.refresh()
+
+    def refresh(self):
+        self.load()
+
+    def _to_book(self, row):
+        return trusted_row_to_book(row) if self.index.trusted else row_to_book(row)
+
+    def _mark_written(self):
+        # Só linhas de livros já validados foram gravadas: o marcador continua
+        # valendo se valia antes da escrita
+        if self.index.trusted:
+            mark_validated(self.csv_file)
+        self.index.signature = self.index.file_signature()
+
+    def all(self):
+        started = time.perf_counter()
+        books = [self._to_book(row) for _, row in self.scan()]
+        # Bytes e linhas já foram contados pela varredura
+        record_full_read(time.perf_counter() - started)
+        if self.index.trusted:
+            TRUSTED_LOADS.inc()
+        add_rows(len(books))
+        return books
+
+    def get(self, book_id: int):
+        with self._lock:
+            self.index.refresh()
+            return self.index.read(book_id)
+
+    def version(self):
+        # Reescritas incrementam a geração; inserções só anexam, então o
+        # tamanho do arquivo sempre cresce
+        with self._lock:
+            self.index.refresh()
+            return (self.index.generation, self.index.signature)
+
+    def count(self, title: str = None, author: str = None, year: int = None, genre: str = None):
+        if title or author or year or genre:
+            return sum(1 for _, row in self.scan() if row_matches(row, title, author, year, genre))
+        with self._lock:
+            self.index.refresh()
+            return len(self.index.offsets)
+
+    def count_breakdown(self):
+        total, genres, years = 0, Counter(), Counter()
+        for _, row in self.scan():
+            total += 1
+            genres[row[4]] += 1
+            years[int(row[3])] += 1
+        return total, genres, years
+
+    def cursor_generation(self, sort_by: str = None):
+        # Offsets em bytes sobrevivem a inserções, que só anexam; páginas
+        # ordenadas usam posições na sequência, deslocadas por qualquer escrita
+        if sort_by:
+            return self.version()
+        with self._lock:
+            self.index.refresh()
+            return self.index.generation
+
+    def page(self, title: str, author: str, year: int, genre: str, position, skip: int, limit: int,
+             year_range=None, pages_range=None, sort_by: str = None, descending: bool = False):
+        if sort_by or year_range or pages_range:
+            # Sem índices ordenados aqui: filtra e ordena o catálogo inteiro,
+            # e a posição volta a ser o índice na sequência de resultados
+            return super().page(
+                title, author, year, genre, position, skip, limit, year_range, pages_range, sort_by, descending
+            )
+        # A posição é o offset em bytes da linha seguinte no CSV
+        matches = (
+            (end, row) for end, row in self.scan(position)
+            if row_matches(row, title, author, year, genre)
+        )
+        page = list(islice(matches, skip, skip + limit + 1))
+        books = [self._to_book(row) for _, row in page[:limit]]
+        return books, (page[limit - 1][0] if len(page) > limit else None)
+
+    def add_many(self, books):
+        with self._file_lock, self._lock:
+            self.index.refresh()
+            results = []
+            rows = {}
+            for book in books:
+                if book.id in self.index.offsets or book.id in rows:
+                    results.append(False)
+                    continue
+                rows[book.id] = _encode_row(book)
+                results.append(True)
+            if not rows:
+                return results
+            if not os.path.exists(self.csv_file) or os.path.getsize(self.csv_file) == 0:
+                self._before_write(0)
+                with open(self.csv_file, 'wb') as file:
+                    file.write((','.join(FIELDNAMES) + '\r\n').encode('utf-8'))
+                self.index.trusted = True
+            with timed('write_ms'), open(self.csv_file, 'a+b') as file:
+                end = file.seek(0, os.SEEK_END)
+                self._before_write(end - 1)
+                file.seek(end - 1)
+                if file.read(1) != b'\n':
+                    file.write(b'\r\n')
+                    end += 2
+                file.write(b''.join(rows.values()))
+            CSV_BYTES_WRITTEN.inc(sum(len(row) for row in rows.values()))
+            for book_id, row in rows.items():
+                self.index.offsets[book_id] = (end, len(row))
+                end += len(row)
+            self._mark_written()
+            return results
+
+    def scan(self, offset: int = None):
+        # Abre o arquivo e fixa o tamanho já confirmado sob o lock: uma
+        # reescrita troca o arquivo (o descritor aberto continua no antigo) e
+        # uma inserção concorrente só anexa depois de `end`
+        with self._lock:
+            self.index.refresh()
+            if self.index.signature is None:
+                return iter(())
+            file = open(self.csv_file, 'rb')
+            end = self.index.signature[1]
+        return self._scan(file, offset, end)
+
+    def _scan(self, file, offset: int, end: int):
+        with file:
+            yield from scan_file(file, offset, end)
+
+    def _rewrite(self, rows: dict, renamed: dict = None):
+        # Copia o arquivo em blocos trocando as linhas dos ids em `rows` (b''
+        # remove a linha) e desloca os offsets das linhas seguintes; `renamed`
+        # leva ids antigos aos novos. Chamado com o _file_lock: nenhum outro
+        # escritor mexe no arquivo nem nos offsets durante a cópia, e as
+        # leituras seguem no arquivo atual até a troca
+        changes = sorted((self.index.offsets[book_id], row) for book_id, row in rows.items())
+        tmp_file = self.csv_file + '.tmp'
+        started = time.perf_counter()
+        with timed('write_ms'), open(self.csv_file, 'rb') as src, open(tmp_file, 'wb') as dst:
+            position = 0
+            for (offset, length), row in changes:
+                remaining = offset - position
+                while remaining:
+                    chunk = src.read(min(COPY_CHUNK, remaining))
+                    dst.write(chunk)
+                    remaining -= len(chunk)
+                dst.write(row)
+                position = offset + length
+                src.seek(position)
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+        starts = [offset for (offset, _), _ in changes]
+        shifts = list(accumulate((len(row) - length for (_, length), row in changes), initial=0))
+        offsets = {}
+        for book_id, (offset, length) in self.index.offsets.items():
+            if book_id in rows:
+                if not rows[book_id]:
+                    continue
+                length = len(rows[book_id])
+            offsets[renamed.get(book_id, book_id) if renamed else book_id] = (
+                offset + shifts[bisect_left(starts, offset)], length
+            )
+        with self._lock:
+            self._before_write(changes[0][0][0])
+            os.replace(tmp_file, self.csv_file)
+            self.index.generation += 1
+            self.index.offsets = offsets
+            self._mark_written()
+        record_rewrite(time.perf_counter() - started, os.path.getsize(self.csv_file))
+        self.index.save()
+
+    def replace(self, book_id: int, updated_book: Book):
+        with self._file_lock:
+            with self._lock:
+                self.index.refresh()
+                if book_id not in self.index.offsets:
+                    return None
+                if updated_book.id != book_id and updated_book.id in self.index.offsets:
+                    raise ValueError(f"Livro com ID {updated_book.id} já existe")
+            self._rewrite({book_id: _encode_row(updated_book)}, {book_id: updated_book.id})
+            return updated_book
+
+    def replace_many(self, books):
+        with self._file_lock:
+            with self._lock:
+                self.index.refresh()
+                rows = {book.id: _encode_row(book) for book in books if book.id in self.index.offsets}
+            if rows:
+                self._rewrite(rows)
+            return [book if book.id in rows else None for book in books]
+
+    def remove_many(self, book_ids):
+        with self._file_lock:
+            with self._lock:
+                self.index.refresh()
+                removed = {}
+                results = []
+                for book_id in book_ids:
+                    book = None if book_id in removed else self.index.read(book_id)
+                    if book is not None:
+                        removed[book_id] = b''
+                    results.append(book)
+            if removed:
+                self._rewrite(removed)
+            return results
+
+    def replace_all(self, books):
+        with self._file_lock:
+            self._before_write(0)
+            write_csv(self.csv_file, books)
+            with self._lock:
+                self.index.refresh()
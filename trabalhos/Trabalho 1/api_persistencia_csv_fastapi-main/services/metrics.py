@@ -0,0 +1,152 @@
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Métricas no formato texto do Prometheus, sem depender de um cliente
+# externo. Cada métrica guarda os valores por tupla de labels e se
+# renderiza em `lines()`; `render()` junta todas as registradas.
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, description: str, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def lines(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f'{self.name}{_labels(self.label_names, labels)} {_number(value)}'
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name: str, description: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def lines(self):
+        with self._lock:
+            items = sorted((labels, ([*state[0]], state[1], state[2])) for labels, state in self._values.items())
+        names = self.label_names + ('le',)
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}'
+            yield f'{self.name}_bucket{_labels(names, labels + ("+Inf",))} {count}'
+            yield f'{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}'
+            yield f'{self.name}_count{_labels(self.label_names, labels)} {count}'
+
+# Valor calculado na hora da coleta, para expor estado que já vive em
+# outros objetos (caches, fila de escrita)
+class MetricFunction:
+    def __init__(self, name: str, description: str, function, kind: str = 'gauge'):
+        self.name = name
+        self.description = description
+        self.function = function
+        self.kind = kind
+        REGISTRY.append(self)
+
+    def lines(self):
+        yield f'{self.name} {_number(self.function())}'
+
+REGISTRY = []
+
+def render():
+    output = []
+    for metric in REGISTRY:
+        output.append(f'# HELP {metric.name} {metric.description}')
+        output.append(f'# TYPE {metric.name} {metric.kind}')
+        output.extend(metric.lines())
+    return '\n'.join(output) + '\n'
+
+def ratio(hits: int, misses: int):
+    total = hits + misses
+    return hits / total if total else 0.0
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'books_http_request_duration_seconds', 'Latência das requisições por rota', labels=('method', 'route')
+)
+HTTP_REQUESTS = Counter(
+    'books_http_requests_total', 'Requisições atendidas por rota e status', labels=('method', 'route', 'status')
+)
+CSV_FULL_READS = Counter('books_csv_full_reads_total', 'Leituras completas do CSV')
+CSV_FULL_READ_SECONDS = Histogram('books_csv_full_read_duration_seconds', 'Duração das leituras completas do CSV')
+CSV_REWRITES = Counter('books_csv_rewrites_total', 'Reescritas do CSV')
+CSV_REWRITE_SECONDS = Histogram('books_csv_rewrite_duration_seconds', 'Duração das reescritas do CSV')
+CSV_BYTES_READ = Counter('books_csv_bytes_read_total', 'Bytes lidos dos arquivos de dados')
+CSV_BYTES_WRITTEN = Counter('books_csv_bytes_written_total', 'Bytes gravados nos arquivos de dados')
+CSV_ROWS_PARSED = Counter('books_csv_rows_parsed_total', 'Linhas do CSV parseadas')
+VALIDATIONS = Counter('books_validations_total', 'Livros validados pelo pydantic')
+VALIDATION_SECONDS = Counter('books_validation_seconds_total', 'Tempo gasto na validação pydantic dos livros')
+TRUSTED_LOADS = Counter(
+    'books_csv_trusted_loads_total', 'Cargas completas do CSV que pularam a validação por estar marcado como validado'
+)
+STORE_SECONDS = Histogram(
+    'books_store_duration_seconds', 'Duração da carga do catálogo e das gravações do CSV', labels=('operation',)
+)
+
+def record_full_read(seconds: float, size: int = 0, rows: int = 0):
+    CSV_FULL_READS.inc()
+    CSV_FULL_READ_SECONDS.observe(seconds)
+    CSV_BYTES_READ.inc(size)
+    CSV_ROWS_PARSED.inc(rows)
+
+def record_rewrite(seconds: float, size: int):
+    CSV_REWRITES.inc()
+    CSV_REWRITE_SECONDS.observe(seconds)
+    CSV_BYTES_WRITTEN.inc(size)
+
+def record_validation(seconds: float, count: int = 1):
+    VALIDATIONS.inc(count)
+    VALIDATION_SECONDS.inc(seconds)
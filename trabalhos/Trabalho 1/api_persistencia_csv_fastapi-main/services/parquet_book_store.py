@@ -0,0 +1,213 @@
+import os
+import threading
+from models.book import Book
+from services.storage_engine import StorageEngine, read_rows, row_to_book, write_csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Mecanismo colunar: o catálogo fica em uma tabela Arrow em memória e é
+# persistido em Parquet. Filtros, contagens e agrupamentos rodam vetorizados
+# sobre as colunas; cada escrita regrava o arquivo inteiro, então o mecanismo
+# é voltado a cargas com muitas leituras analíticas e poucas mutações.
+class ParquetBookStore(StorageEngine):
+    def __init__(self, parquet_file: str, seed_csv: str = None):
+        if pa is None:
+            raise RuntimeError("O mecanismo parquet requer o pacote pyarrow")
+        super().__init__()
+        self.parquet_file = parquet_file
+        self.csv_file = parquet_file + '.csv'
+        self.seed_csv = seed_csv
+        self.schema = pa.schema([
+            ('id', pa.int64()), ('title', pa.string()), ('author', pa.string()),
+            ('year', pa.int64()), ('genre', pa.string()), ('pages', pa.int64()),
+        ])
+        self._table = None
+        self._positions = {}
+        self._signature = None
+        self._version = 0
+        self._exported_version = None
+        self._lock = threading.RLock()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.parquet_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _set_table(self, table):
+        self._table = table
+        self._positions = {book_id: i for i, book_id in enumerate(table.column('id').to_pylist())}
+        self._version += 1
+
+    def _write(self, table):
+        tmp_file = self.parquet_file + '.tmp'
+        pq.write_table(table, tmp_file)
+        os.replace(tmp_file, self.parquet_file)
+        self._set_table(table)
+        self._signature = self._file_signature()
+
+    def _from_books(self, books):
+        return pa.Table.from_pylist([book.model_dump() for book in books], schema=self.schema)
+
+    def load(self):
+        with self._lock:
+            if os.path.exists(self.parquet_file):
+                self._set_table(pq.read_table(self.parquet_file, schema=self.schema))
+                self._signature = self._file_signature()
+            elif self.seed_csv and os.path.exists(self.seed_csv):
+                self._write(self._from_books(row_to_book(row) for row in read_rows(self.seed_csv)))
+            else:
+                self._set_table(self.schema.empty_table())
+
+    def refresh(self):
+        with self._lock:
+            if self._table is None or self._file_signature() != self._signature:
+                self.load()
+
+    def version(self):
+        with self._lock:
+            self.refresh()
+            return self._version
+
+    def _current(self):
+        with self._lock:
+            self.refresh()
+            return self._table
+
+    def synced_csv(self):
+        with self._lock:
+            self.refresh()
+            if self._exported_version != self._version or not os.path.exists(self.csv_file):
+                self._before_write(0)
+                write_csv(self.csv_file, self._iter_books(self._current()))
+                self._exported_version = self._version
+            return self.csv_file
+
+    @staticmethod
+    def _books(table):
+        return [Book(**row) for row in table.to_pylist()]
+
+    def all(self):
+        return self._books(self._current())
+
+    @staticmethod
+    def _iter_books(table):
+        # Converte um lote de registros por vez em vez da tabela inteira
+        for batch in table.to_batches():
+            for row in batch.to_pylist():
+                yield Book(**row)
+
+    def get(self, book_id: int):
+        with self._lock:
+            table = self._current()
+            position = self._positions.get(book_id)
+            if position is None:
+                return None
+            return self._books(table.slice(position, 1))[0]
+
+    def add_many(self, books):
+        with self._lock:
+            table = self._current()
+            results = []
+            added = {}
+            for book in books:
+                duplicated = book.id in self._positions or book.id in added
+                if not duplicated:
+                    added[book.id] = book
+                results.append(not duplicated)
+            if added:
+                self._write(pa.concat_tables([table, self._from_books(added.values())]))
+            return results
+
+    def _rewrite_rows(self, table, updates: dict):
+        rows = table.to_pylist()
+        for position, book in updates.items():
+            rows[position] = book.model_dump()
+        return pa.Table.from_pylist(rows, schema=self.schema)
+
+    def replace(self, book_id: int, updated_book: Book):
+        with self._lock:
+            table = self._current()
+            if book_id not in self._positions:
+                return None
+            if updated_book.id != book_id and updated_book.id in self._positions:
+                raise ValueError(f"Livro com ID {updated_book.id} já existe")
+            self._write(self._rewrite_rows(table, {self._positions[book_id]: updated_book}))
+            return updated_book
+
+    def replace_many(self, books):
+        with self._lock:
+            table = self._current()
+            updates = {self._positions[book.id]: book for book in books if book.id in self._positions}
+            if updates:
+                self._write(self._rewrite_rows(table, updates))
+            return [book if book.id in self._positions else None for book in books]
+
+    def remove_many(self, book_ids):
+        with self._lock:
+            table = self._current()
+            results = []
+            removed = set()
+            for book_id in book_ids:
+                book = None if book_id in removed else self.get(book_id)
+                if book is not None:
+                    removed.add(book_id)
+                results.append(book)
+            if removed:
+                self._write(table.filter(pc.invert(pc.is_in(table['id'], value_set=pa.array(list(removed), pa.int64())))))
+            return results
+
+    def replace_all(self, books):
+        with self._lock:
+            self._write(self._from_books(books))
+
+    def _filtered(self, title: str, author: str, year: int, genre: str, year_range=None, pages_range=None):
+        table = self._current()
+        conditions = []
+        for column, value in (('title', title), ('author', author), ('genre', genre)):
+            if value:
+                conditions.append(pc.match_substring(pc.utf8_lower(table[column]), value.lower()))
+        if year:
+            conditions.append(pc.equal(table['year'], year))
+        for column, bounds in (('year', year_range), ('pages', pages_range)):
+            low, high = bounds or (None, None)
+            if low is not None:
+                conditions.append(pc.greater_equal(table[column], low))
+            if high is not None:
+                conditions.append(pc.less_equal(table[column], high))
+        if not conditions:
+            return table
+        mask = conditions[0]
+        for condition in conditions[1:]:
+            mask = pc.and_(mask, condition)
+        return table.filter(mask)
+
+    def count(self, title: str = None, author: str = None, year: int = None, genre: str = None):
+        return self._filtered(title, author, year, genre).num_rows
+
+    def count_breakdown(self):
+        table = self._current()
+        genres = {item['values']: item['counts'] for item in pc.value_counts(table['genre']).to_pylist()}
+        years = {item['values']: item['counts'] for item in pc.value_counts(table['year']).to_pylist()}
+        return table.num_rows, genres, years
+
+    def page(self, title: str, author: str, year: int, genre: str, position, skip: int, limit: int,
+             year_range=None, pages_range=None, sort_by: str = None, descending: bool = False):
+        # A posição é o índice na sequência de resultados
+        table = self._filtered(title, author, year, genre, year_range, pages_range)
+        start = (position or 0) + skip
+        if sort_by:
+            # sort_indices é estável: empates ficam na ordem do catálogo
+            indices = pc.sort_indices(table, sort_keys=[(sort_by, 'ascending')])
+            if descending:
+                indices = indices[::-1]
+            books = self._books(table.take(indices.slice(start, limit)))
+        else:
+            books = self._books(table.slice(start, limit))
+        return books, (start + limit if table.num_rows > start + limit else None)
@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Cache LRU das respostas já serializadas de GET /livros, indexado pela
+# versão do catálogo e pelos filtros normalizados. Entradas expiram após
+# `ttl` segundos; `max_entries` igual a 0 desliga o cache.
+class QueryCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(version, title: str, author: str, year: int, genre: str, skip: int, limit: int, cursor: str,
+            year_range=None, pages_range=None, sort_by: str = None, descending: bool = False):
+        # Os filtros de texto não diferenciam maiúsculas e valores vazios
+        # equivalem a não filtrar
+        return (
+            version, title.lower() if title else None, author.lower() if author else None,
+            year or None, genre.lower() if genre else None, skip, limit, cursor,
+            year_range, pages_range, sort_by, descending,
+        )
+
+    def get(self, key):
+        if not self.max_entries:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,99 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from services.metrics import HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+
+_current = ContextVar('request_stats', default=None)
+
+request_logger = logging.getLogger('books.requests')
+
+# Contadores de uma requisição: linhas do catálogo examinadas e tempo gasto
+# parseando e gravando o CSV. O objeto fica em uma ContextVar, que o
+# threadpool do Starlette copia para as threads das rotas síncronas; como é
+# mutável, o que as camadas de baixo somam aparece para o middleware.
+class RequestStats:
+    __slots__ = ('rows_scanned', 'parse_ms', 'write_ms')
+
+    def __init__(self):
+        self.rows_scanned = 0
+        self.parse_ms = 0.0
+        self.write_ms = 0.0
+
+    def merge(self, other):
+        self.rows_scanned += other.rows_scanned
+        self.parse_ms += other.parse_ms
+        self.write_ms += other.write_ms
+
+def current_stats():
+    return _current.get()
+
+def bind_stats(stats):
+    return _current.set(stats)
+
+def unbind_stats(token):
+    _current.reset(token)
+
+def add_rows(count: int):
+    stats = _current.get()
+    if stats is not None:
+        stats.rows_scanned += count
+
+@contextmanager
+def timed(field: str):
+    # Soma a duração do bloco em `parse_ms` ou `write_ms` da requisição atual
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(stats, field, getattr(stats, field) + (time.perf_counter() - started) * 1000)
+
+# Middleware ASGI que grava uma linha chave=valor por requisição com método,
+# rota, status, latência total e os contadores acima. A linha sai quando o
+# último pedaço do corpo é enviado, então respostas em streaming entram com
+# o tempo completo.
+class RequestLogMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = bind_stats(stats)
+        started = time.perf_counter()
+        status = 500
+        logged = False
+
+        def log():
+            latency = time.perf_counter() - started
+            # Rotas não encontradas entram agrupadas para não explodir os labels
+            route = getattr(scope.get('route'), 'path', None)
+            HTTP_REQUEST_SECONDS.observe(latency, scope['method'], route or 'unmatched')
+            HTTP_REQUESTS.inc(1, scope['method'], route or 'unmatched', status)
+            request_logger.info(
+                "requisição method=%s route=%s status=%d latency_ms=%.2f rows_scanned=%d parse_ms=%.2f write_ms=%.2f",
+                scope['method'], route or scope['path'], status,
+                latency * 1000, stats.rows_scanned, stats.parse_ms, stats.write_ms,
+            )
+
+        async def send_wrapper(message):
+            nonlocal status, logged
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                logged = True
+                log()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            unbind_stats(token)
+            if not logged:
+                log()
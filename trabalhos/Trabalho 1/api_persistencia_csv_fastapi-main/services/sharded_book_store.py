@@ -0,0 +1,263 @@
+import heapq
+import json
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+from operator import attrgetter
+from models.book import Book
+from services.book_journal import BookJournal
+from services.book_sequence import BookSequence
+from services.book_store import BookStore
+from services.storage_engine import StorageEngine, read_rows, row_to_book, write_csv
+
+MANIFEST_FILE = 'manifest.json'
+SEQUENCE_FILE = 'sequence.log'
+
+# Catálogo particionado em N CSVs por hash do id (id % N), descritos por um
+# manifest.json no diretório dos shards. Cada shard é um BookStore próprio,
+# com índices e, opcionalmente, journal, então leituras e escritas de um
+# livro tocam um único arquivo e uma mutação regrava só 1/N do catálogo.
+# Cargas, buscas e páginas rodam nos shards em paralelo. A ordem do catálogo
+# (inserção, como nos demais mecanismos) fica no sequence.log (BookSequence):
+# os shards ordenam e desempatam por ela e os resultados são intercalados por
+# posição. `csv_file` é um CSV único com o catálogo inteiro, regenerado sob
+# demanda para /hash e /download.
+class ShardedBookStore(StorageEngine):
+    def __init__(self, directory: str, shards: int, seed_csv: str = None, journal: bool = False,
+                 compact_bytes: int = 0):
+        super().__init__()
+        self.directory = directory
+        self.csv_file = os.path.join(directory, 'books.csv')
+        self.seed_csv = seed_csv
+        self.journal = journal
+        self.compact_bytes = compact_bytes
+        self.shard_count = shards
+        self.shards = []
+        self._pool = None
+        self._exported_version = None
+        self.sequence = BookSequence(os.path.join(directory, SEQUENCE_FILE))
+        self._lock = threading.RLock()
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _open_shards(self, files):
+        self.shards = []
+        for name in files:
+            path = os.path.join(self.directory, name)
+            journal = BookJournal(path) if self.journal else None
+            self.shards.append(BookStore(
+                path, journal=journal, compact_bytes=self.compact_bytes, sequence=self.sequence
+            ))
+        self.shard_count = len(self.shards)
+        if self._pool is not None:
+            self._pool.shutdown()
+        self._pool = ThreadPoolExecutor(max_workers=self.shard_count, thread_name_prefix='book-shard')
+
+    def _create(self):
+        # Primeira carga: distribui o CSV existente entre os shards e só então
+        # grava o manifesto, que marca o diretório como pronto
+        os.makedirs(self.directory, exist_ok=True)
+        files = [f'shard-{i:03d}.csv' for i in range(self.shard_count)]
+        partitions = [[] for _ in files]
+        ids = {}
+        if self.seed_csv and os.path.exists(self.seed_csv):
+            for row in read_rows(self.seed_csv):
+                book = row_to_book(row)
+                partitions[book.id % len(files)].append(book)
+                ids[book.id] = None
+        for name, books in zip(files, partitions):
+            write_csv(os.path.join(self.directory, name), books)
+        self.sequence.reset(ids)
+        manifest = {'format': 1, 'partition': 'hash', 'shards': files}
+        tmp_file = self._manifest_path() + '.tmp'
+        with open(tmp_file, mode='w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(tmp_file, self._manifest_path())
+        return manifest
+
+    def load(self):
+        with self._lock:
+            if os.path.exists(self._manifest_path()):
+                with open(self._manifest_path(), encoding='utf-8') as file:
+                    manifest = json.load(file)
+            else:
+                manifest = self._create()
+            logged = self.sequence.load()
+            self._open_shards(manifest['shards'])
+            if logged:
+                list(self._pool.map(BookStore.load, self.shards))
+            else:
+                # Shards anteriores ao log: carrega um a um para que as
+                # posições sigam a ordem antiga, shard a shard
+                for shard in self.shards:
+                    shard.load()
+            self.sequence.compact(book.id for shard in self.shards for book in shard.iter_books())
+
+    def rollback(self):
+        # Recarrega os shards abertos em vez de reabri-los: as versões deles
+        # continuam crescendo, e nenhuma ETag anterior volta a valer
+        with self._lock:
+            if not self.shards:
+                return self.load()
+            self.sequence.load()
+            self._map(BookStore.load)
+            self.sequence.compact(book.id for shard in self.shards for book in shard.iter_books())
+
+    def _ensure_loaded(self):
+        if not self.shards:
+            self.load()
+
+    def refresh(self):
+        with self._lock:
+            self._ensure_loaded()
+            list(self._pool.map(BookStore.refresh, self.shards))
+
+    def _shard(self, book_id: int):
+        return self.shards[book_id % self.shard_count]
+
+    def _map(self, function):
+        self._ensure_loaded()
+        return list(self._pool.map(function, self.shards))
+
+    def compact(self):
+        self._map(BookStore.compact)
+
+    @contextmanager
+    def batch(self):
+        # Aplica o lote sob a trava do catálogo e a de cada shard, e só grava
+        # os CSVs dos shards, em paralelo, depois de soltar todas
+        self._ensure_loaded()
+        with self._lock:
+            with ExitStack() as stack:
+                for shard in self.shards:
+                    stack.enter_context(shard.batch(write=False))
+                yield
+        self._map(BookStore._write_snapshot)
+
+    def version(self):
+        self._ensure_loaded()
+        return tuple(shard.version() for shard in self.shards)
+
+    def synced_csv(self):
+        with self._lock:
+            version = self.version()
+            if version != self._exported_version or not os.path.exists(self.csv_file):
+                self._before_write(0)
+                write_csv(self.csv_file, heapq.merge(*(shard.iter_books() for shard in self.shards), key=self._position))
+                self._exported_version = version
+            return self.csv_file
+
+    def _position(self, book: Book):
+        return self.sequence[book.id]
+
+    def all(self):
+        return list(heapq.merge(*self._map(BookStore.all), key=self._position))
+
+    def get(self, book_id: int):
+        self._ensure_loaded()
+        return self._shard(book_id).get(book_id)
+
+    def _by_shard(self, items, key):
+        # Agrupa os itens por shard guardando a posição original de cada um
+        groups = {}
+        for position, item in enumerate(items):
+            groups.setdefault(key(item) % self.shard_count, []).append((position, item))
+        return groups
+
+    def _scatter(self, items, key, method: str):
+        with self._lock:
+            self._ensure_loaded()
+            results = [None] * len(items)
+            for index, group in self._by_shard(items, key).items():
+                shard_results = getattr(self.shards[index], method)([item for _, item in group])
+                for (position, _), result in zip(group, shard_results):
+                    results[position] = result
+            return results
+
+    def add_many(self, books):
+        with self._lock:
+            self._ensure_loaded()
+            # As posições dos ids novos vão para o log antes dos shards
+            added = {}
+            for book in books:
+                if book.id not in added and self._shard(book.id).get(book.id) is None:
+                    added[book.id] = None
+            self.sequence.append(list(added))
+            return self._scatter(books, attrgetter('id'), 'add_many')
+
+    def replace_many(self, books):
+        return self._scatter(books, attrgetter('id'), 'replace_many')
+
+    def remove_many(self, book_ids):
+        with self._lock:
+            results = self._scatter(book_ids, int, 'remove_many')
+            self.sequence.discard([book.id for book in results if book is not None])
+            return results
+
+    def replace(self, book_id: int, updated_book: Book):
+        with self._lock:
+            self._ensure_loaded()
+            source = self._shard(book_id)
+            target = self._shard(updated_book.id)
+            if updated_book.id == book_id:
+                return source.replace(book_id, updated_book)
+            if source.get(book_id) is None:
+                return None
+            if target.get(updated_book.id) is not None:
+                raise ValueError(f"Livro com ID {updated_book.id} já existe")
+            # O novo id herda a posição do antigo antes de chegar aos índices
+            self.sequence.rename(book_id, updated_book.id)
+            if source is target:
+                return source.replace(book_id, updated_book)
+            # Troca de id entre shards: sai do shard de origem e entra no de
+            # destino, na mesma posição do catálogo
+            source.remove(book_id)
+            target.add(updated_book)
+            return updated_book
+
+    def replace_all(self, books):
+        with self._lock:
+            self._ensure_loaded()
+            partitions = [[] for _ in self.shards]
+            ids = {}
+            for book in books:
+                partitions[book.id % self.shard_count].append(book)
+                ids[book.id] = None
+            self.sequence.reset(ids)
+            for shard, shard_books in zip(self.shards, partitions):
+                shard.replace_all(shard_books)
+
+    def count(self, title: str = None, author: str = None, year: int = None, genre: str = None):
+        return sum(self._map(lambda shard: shard.count(title, author, year, genre)))
+
+    def count_breakdown(self):
+        total, genres, years = 0, Counter(), Counter()
+        for shard_total, shard_genres, shard_years in self._map(BookStore.count_breakdown):
+            total += shard_total
+            genres.update(shard_genres)
+            years.update(shard_years)
+        return total, genres, years
+
+    def page(self, title: str, author: str, year: int, genre: str, position, skip: int, limit: int,
+             year_range=None, pages_range=None, sort_by: str = None, descending: bool = False):
+        # A posição é o índice na sequência de resultados. Cada shard devolve
+        # seus primeiros start + limit + 1 resultados, já na ordem pedida, e o
+        # merge os intercala pela mesma chave: o campo ordenado (o da faixa,
+        # sem sort_by, como no BookStore) e, no empate, a posição no catálogo
+        start = (position or 0) + skip
+        field = sort_by or ('year' if year_range else 'pages' if pages_range else None)
+        pages = self._map(lambda shard: shard.page(
+            title, author, year, genre, None, 0, start + limit + 1, year_range, pages_range, sort_by, descending
+        )[0])
+        if field is None:
+            merged = heapq.merge(*pages, key=self._position)
+        else:
+            merged = heapq.merge(
+                *pages, key=lambda book: (getattr(book, field), self._position(book)), reverse=descending
+            )
+        books = list(islice(merged, start, start + limit + 1))
+        return books[:limit], (start + limit if len(books) > limit else None)
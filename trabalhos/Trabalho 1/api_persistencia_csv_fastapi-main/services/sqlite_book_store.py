@@ -0,0 +1,205 @@
+import os
+import sqlite3
+import threading
+from models.book import Book
+from services.storage_engine import FIELDNAMES, StorageEngine, read_rows, row_to_book, write_csv
+
+COLUMNS = ', '.join(FIELDNAMES)
+
+def _where(title: str, author: str, year: int, genre: str, year_range=None, pages_range=None):
+    # py_lower reproduz o str.lower do Python, inclusive para acentos
+    clauses = []
+    params = []
+    for column, value in (('title', title), ('author', author), ('genre', genre)):
+        if value:
+            clauses.append(f"instr(py_lower({column}), ?) > 0")
+            params.append(value.lower())
+    if year:
+        clauses.append("year = ?")
+        params.append(year)
+    for column, bounds in (('year', year_range), ('pages', pages_range)):
+        low, high = bounds or (None, None)
+        if low is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(low)
+        if high is not None:
+            clauses.append(f"{column} <= ?")
+            params.append(high)
+    return (' AND '.join(clauses) or '1'), params
+
+def _to_book(row):
+    return Book(**dict(zip(FIELDNAMES, row)))
+
+# Mecanismo SQLite: um arquivo de banco transacional com índice único em id e
+# índices em year e genre. A ordem de inserção é preservada pelo rowid, que
+# também serve de cursor de paginação. Na primeira carga com a tabela vazia,
+# importa o CSV existente.
+class SqliteBookStore(StorageEngine):
+    def __init__(self, db_file: str, seed_csv: str = None):
+        super().__init__()
+        self.db_file = db_file
+        self.csv_file = db_file + '.csv'
+        self.seed_csv = seed_csv
+        self._conn = None
+        self._version = 0
+        self._exported_version = None
+        self._lock = threading.RLock()
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.create_function('py_lower', 1, str.lower, deterministic=True)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS books ('
+                'id INTEGER NOT NULL UNIQUE, title TEXT NOT NULL, author TEXT NOT NULL, '
+                'year INTEGER NOT NULL, genre TEXT NOT NULL, pages INTEGER NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS books_year ON books (year)')
+            conn.execute('CREATE INDEX IF NOT EXISTS books_genre ON books (genre)')
+            conn.execute('CREATE INDEX IF NOT EXISTS books_pages ON books (pages)')
+            self._conn = conn
+            empty = conn.execute('SELECT 1 FROM books LIMIT 1').fetchone() is None
+            if empty and self.seed_csv and os.path.exists(self.seed_csv):
+                with conn:
+                    conn.executemany(
+                        f'INSERT OR IGNORE INTO books ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)',
+                        (tuple(row_to_book(row).model_dump().values()) for row in read_rows(self.seed_csv))
+                    )
+        return self._conn
+
+    def load(self):
+        with self._lock:
+            self._connection()
+
+    def synced_csv(self):
+        with self._lock:
+            version = self.version()
+            if version != self._exported_version or not os.path.exists(self.csv_file):
+                self._before_write(0)
+                write_csv(self.csv_file, self._iter_books())
+                self._exported_version = version
+            return self.csv_file
+
+    def version(self):
+        with self._lock:
+            return (self._version, self._connection().execute('PRAGMA data_version').fetchone()[0])
+
+    def _query(self, sql: str, params=()):
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def all(self):
+        return [_to_book(row) for row in self._query(f'SELECT {COLUMNS} FROM books ORDER BY rowid')]
+
+    def _iter_books(self):
+        # Lê o cursor em fluxo, sem montar a lista inteira; quem chama segura
+        # a trava até o fim
+        for row in self._connection().execute(f'SELECT {COLUMNS} FROM books ORDER BY rowid'):
+            yield _to_book(row)
+
+    def get(self, book_id: int):
+        rows = self._query(f'SELECT {COLUMNS} FROM books WHERE id = ?', (book_id,))
+        return _to_book(rows[0]) if rows else None
+
+    def add_many(self, books):
+        with self._lock:
+            conn = self._connection()
+            results = []
+            with conn:
+                for book in books:
+                    cursor = conn.execute(
+                        f'INSERT INTO books ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO NOTHING',
+                        tuple(book.model_dump().values())
+                    )
+                    results.append(cursor.rowcount == 1)
+            self._version += 1
+            return results
+
+    def replace(self, book_id: int, updated_book: Book):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if conn.execute('SELECT 1 FROM books WHERE id = ?', (book_id,)).fetchone() is None:
+                    return None
+                if updated_book.id != book_id and conn.execute(
+                    'SELECT 1 FROM books WHERE id = ?', (updated_book.id,)
+                ).fetchone() is not None:
+                    raise ValueError(f"Livro com ID {updated_book.id} já existe")
+                conn.execute(
+                    'UPDATE books SET id = ?, title = ?, author = ?, year = ?, genre = ?, pages = ? WHERE id = ?',
+                    (*updated_book.model_dump().values(), book_id)
+                )
+            self._version += 1
+            return updated_book
+
+    def replace_many(self, books):
+        with self._lock:
+            conn = self._connection()
+            results = []
+            with conn:
+                for book in books:
+                    cursor = conn.execute(
+                        'UPDATE books SET title = ?, author = ?, year = ?, genre = ?, pages = ? WHERE id = ?',
+                        (book.title, book.author, book.year, book.genre, book.pages, book.id)
+                    )
+                    results.append(book if cursor.rowcount else None)
+            self._version += 1
+            return results
+
+    def remove_many(self, book_ids):
+        with self._lock:
+            conn = self._connection()
+            results = []
+            with conn:
+                for book_id in book_ids:
+                    row = conn.execute(f'SELECT {COLUMNS} FROM books WHERE id = ?', (book_id,)).fetchone()
+                    if row is not None:
+                        conn.execute('DELETE FROM books WHERE id = ?', (book_id,))
+                    results.append(_to_book(row) if row else None)
+            self._version += 1
+            return results
+
+    def replace_all(self, books):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM books')
+                conn.executemany(
+                    f'INSERT INTO books ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)',
+                    (tuple(book.model_dump().values()) for book in books)
+                )
+            self._version += 1
+
+    def count(self, title: str = None, author: str = None, year: int = None, genre: str = None):
+        where, params = _where(title, author, year, genre)
+        return self._query(f'SELECT COUNT(*) FROM books WHERE {where}', params)[0][0]
+
+    def count_breakdown(self):
+        with self._lock:
+            total = self._query('SELECT COUNT(*) FROM books')[0][0]
+            genres = dict(self._query('SELECT genre, COUNT(*) FROM books GROUP BY genre'))
+            years = dict(self._query('SELECT year, COUNT(*) FROM books GROUP BY year'))
+        return total, genres, years
+
+    def page(self, title: str, author: str, year: int, genre: str, position, skip: int, limit: int,
+             year_range=None, pages_range=None, sort_by: str = None, descending: bool = False):
+        where, params = _where(title, author, year, genre, year_range, pages_range)
+        if sort_by:
+            # Ordenado pelos índices de year/pages; a posição é o índice na
+            # sequência de resultados e o rowid desempata
+            direction = 'DESC' if descending else 'ASC'
+            start = (position or 0) + skip
+            rows = self._query(
+                f'SELECT {COLUMNS} FROM books WHERE {where} '
+                f'ORDER BY {sort_by} {direction}, rowid {direction} LIMIT ? OFFSET ?',
+                (*params, limit + 1, start)
+            )
+            return [_to_book(row) for row in rows[:limit]], (start + limit if len(rows) > limit else None)
+        # A posição é o rowid do último livro entregue
+        rows = self._query(
+            f'SELECT rowid, {COLUMNS} FROM books WHERE rowid > ? AND {where} ORDER BY rowid LIMIT ? OFFSET ?',
+            (position or 0, *params, limit + 1, skip)
+        )
+        books = [_to_book(row[1:]) for row in rows[:limit]]
+        return books, (rows[limit - 1][0] if len(rows) > limit else None)
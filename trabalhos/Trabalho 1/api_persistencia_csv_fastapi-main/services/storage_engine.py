@@ -0,0 +1,297 @@
+import csv
+import io
+import os
+import shutil
+import time
+from collections import Counter
+from contextlib import nullcontext
+from itertools import islice
+from operator import attrgetter
+from models.book import Book
+from services.csv_compression import compression_of, open_csv
+from services.metrics import (
+    CSV_BYTES_READ, CSV_ROWS_PARSED, STORE_SECONDS, TRUSTED_LOADS, record_rewrite, record_validation,
+)
+from services.request_stats import current_stats, timed
+
+FIELDNAMES = ['id', 'title', 'author', 'year', 'genre', 'pages']
+
+VALIDATED_SUFFIX = '.validated'
+
+def row_to_book(row):
+    started = time.perf_counter()
+    book = Book(**dict(zip(FIELDNAMES, row)))
+    record_validation(time.perf_counter() - started)
+    return book
+
+def trusted_row_to_book(row):
+    # Linha de um CSV gravado pelo próprio serviço: colunas na ordem de
+    # FIELDNAMES e valores já validados, então só converte os tipos
+    return Book.model_construct(
+        id=int(row[0]), title=row[1], author=row[2], year=int(row[3]), genre=row[4], pages=int(row[5])
+    )
+
+def _file_identity(csv_file: str):
+    try:
+        stat = os.stat(csv_file)
+    except FileNotFoundError:
+        return None
+    return f'{stat.st_size} {stat.st_mtime_ns}'
+
+# Marcador de geração validada: books.csv.validated guarda o tamanho e o mtime
+# do CSV da última vez que o serviço o gravou ou o validou por inteiro.
+# Enquanto baterem, o arquivo não foi editado fora da API e a carga pode
+# pular a validação do pydantic.
+# Só um CSV com as colunas na ordem de FIELDNAMES é marcado: a carga
+# confiável e as leituras por offset são posicionais.
+def mark_validated(csv_file: str):
+    identity = _file_identity(csv_file)
+    if identity is not None and read_header(csv_file) == FIELDNAMES:
+        with open(csv_file + VALIDATED_SUFFIX, mode='w', encoding='utf-8') as file:
+            file.write(identity)
+
+def is_validated(csv_file: str):
+    try:
+        with open(csv_file + VALIDATED_SUFFIX, encoding='utf-8') as file:
+            marker = file.read()
+    except FileNotFoundError:
+        return False
+    return marker == _file_identity(csv_file)
+
+def read_header(csv_file: str):
+    with open_csv(csv_file) as raw, io.TextIOWrapper(raw, encoding='utf-8', newline='') as file:
+        return next(csv.reader(file), None)
+
+def column_order(header):
+    # Posição de cada campo de FIELDNAMES no cabeçalho, ou None se ele já
+    # está nessa ordem
+    if header == FIELDNAMES:
+        return None
+    if not set(FIELDNAMES) <= set(header):
+        raise ValueError(f"O CSV deve ter o cabeçalho {','.join(FIELDNAMES)}")
+    return [header.index(field) for field in FIELDNAMES]
+
+def read_rows(csv_file: str):
+    # Campos crus de cada linha, na ordem de FIELDNAMES mesmo que o cabeçalho
+    # tenha outra, sem offsets nem estatísticas por linha; para cargas
+    # completas, que contabilizam a leitura de uma vez
+    with open_csv(csv_file) as raw, io.TextIOWrapper(raw, encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        order = column_order(header)
+        for row in reader:
+            if row:
+                yield row if order is None else [row[i] for i in order]
+
+def read_trusted(csv_file: str):
+    books = [trusted_row_to_book(row) for row in read_rows(csv_file)]
+    TRUSTED_LOADS.inc()
+    return books
+
+def convert_csv(source: str, target: str):
+    # Primeira carga com outro formato: converte o CSV existente em fluxo
+    # (por exemplo, books.csv para books.csv.gz)
+    if source != target and not os.path.exists(target) and os.path.exists(source):
+        with open_csv(source) as src, open_csv(target, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+
+def book_matches(book: Book, title: str, author: str, year: int, genre: str):
+    if title and title.lower() not in book.title.lower():
+        return False
+    if author and author.lower() not in book.author.lower():
+        return False
+    if year and book.year != year:
+        return False
+    if genre and genre.lower() not in book.genre.lower():
+        return False
+    return True
+
+def in_bounds(value: int, bounds):
+    # Faixa (mínimo, máximo) inclusiva; None em qualquer ponta deixa-a aberta
+    if not bounds:
+        return True
+    low, high = bounds
+    return (low is None or value >= low) and (high is None or value <= high)
+
+def book_in_ranges(book: Book, year_range, pages_range):
+    return in_bounds(book.year, year_range) and in_bounds(book.pages, pages_range)
+
+def row_matches(row, title: str, author: str, year: int, genre: str):
+    if title and title.lower() not in row[1].lower():
+        return False
+    if author and author.lower() not in row[2].lower():
+        return False
+    if year and int(row[3]) != year:
+        return False
+    if genre and genre.lower() not in row[4].lower():
+        return False
+    return True
+
+# Grava o CSV ao lado e o troca pelo atual com os.replace: quem já abriu o
+# arquivo continua lendo a versão anterior inteira, e ninguém vê um arquivo
+# pela metade
+def write_csv(csv_file: str, books):
+    started = time.perf_counter()
+    tmp_file = csv_file + '.tmp'
+    compression = compression_of(csv_file)
+    with timed('write_ms'), STORE_SECONDS.time('write_csv'):
+        with io.TextIOWrapper(open_csv(tmp_file, 'wb', compression), encoding='utf-8', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            for book in books:
+                writer.writerow(book.model_dump())
+        os.replace(tmp_file, csv_file)
+    record_rewrite(time.perf_counter() - started, os.path.getsize(csv_file))
+    mark_validated(csv_file)
+
+# Percorre o CSV sob demanda, gerando (offset da próxima linha, campos crus).
+# Arquivos comprimidos são descomprimidos em fluxo e os offsets se referem ao
+# conteúdo descomprimido. Linhas lidas e tempo de parse (sem contar o consumidor) vão para as
+# estatísticas da requisição.
+def scan_csv(csv_file: str, offset: int = None):
+    if not os.path.exists(csv_file):
+        return
+    with open_csv(csv_file, 'rb') as file:
+        yield from scan_file(file, offset)
+
+# Mesma varredura sobre um arquivo já aberto. Com `end`, para no offset dado:
+# o que foi anexado depois dele (talvez ainda pela metade) fica de fora.
+def scan_file(file, offset: int = None, end: int = None):
+    stats = current_stats()
+    rows = 0
+    elapsed = 0.0
+    first = None
+    started = time.perf_counter()
+    try:
+        file.readline()
+        if offset is None:
+            offset = file.tell()
+        file.seek(offset)
+        first = offset
+        pending = b''
+        for line in file:
+            if end is not None and offset + len(pending) >= end:
+                break
+            pending += line
+            # Campos entre aspas podem conter quebras de linha
+            if pending.count(b'"') % 2:
+                continue
+            offset += len(pending)
+            if pending.strip():
+                row = next(csv.reader(io.StringIO(pending.decode('utf-8'))))
+                rows += 1
+                elapsed += time.perf_counter() - started
+                yield offset, row
+                started = time.perf_counter()
+            pending = b''
+        elapsed += time.perf_counter() - started
+    finally:
+        CSV_ROWS_PARSED.inc(rows)
+        if first is not None:
+            CSV_BYTES_READ.inc(offset - first)
+        if stats is not None:
+            stats.rows_scanned += rows
+            stats.parse_ms += elapsed * 1000
+
+# Interface comum dos mecanismos de armazenamento usados pelo BookService.
+# As consultas têm uma implementação padrão por varredura de `all()`; cada
+# mecanismo sobrescreve as que consegue responder melhor. `csv_file` é o CSV
+# que representa o catálogo para /livros/hash, /download e /export, mantido
+# atualizado por `synced_csv()`. `write_hooks` recebem, antes de cada escrita
+# nesse CSV, o offset a partir do qual o arquivo vai mudar. `batch()` agrupa
+# as mutações feitas dentro do bloco em uma única gravação quando o mecanismo
+# consegue adiá-la; por padrão cada mutação grava sozinha. Se a gravação
+# do lote falha, `rollback()` volta ao catálogo em disco. `version()` muda
+# a cada alteração do catálogo e é a base das ETags.
+class StorageEngine:
+    csv_file = None
+
+    def __init__(self):
+        self.write_hooks = []
+
+    def _before_write(self, offset: int):
+        for hook in self.write_hooks:
+            hook(offset)
+
+    def load(self):
+        pass
+
+    def refresh(self):
+        pass
+
+    def rollback(self):
+        # Descarta mutações aplicadas em memória cuja gravação falhou
+        self.load()
+
+    def compact(self):
+        pass
+
+    def synced_csv(self):
+        return self.csv_file
+
+    def batch(self):
+        return nullcontext()
+
+    def version(self):
+        raise NotImplementedError
+
+    def all(self):
+        raise NotImplementedError
+
+    def get(self, book_id: int):
+        return next((book for book in self.all() if book.id == book_id), None)
+
+    def add(self, book: Book):
+        return self.add_many([book])[0]
+
+    def add_many(self, books):
+        raise NotImplementedError
+
+    def replace(self, book_id: int, updated_book: Book):
+        raise NotImplementedError
+
+    def replace_many(self, books):
+        raise NotImplementedError
+
+    def remove(self, book_id: int):
+        return self.remove_many([book_id])[0]
+
+    def remove_many(self, book_ids):
+        raise NotImplementedError
+
+    def replace_all(self, books):
+        raise NotImplementedError
+
+    def count(self, title: str = None, author: str = None, year: int = None, genre: str = None):
+        return sum(1 for book in self.all() if book_matches(book, title, author, year, genre))
+
+    def count_breakdown(self):
+        books = self.all()
+        genres = Counter(book.genre for book in books)
+        years = Counter(book.year for book in books)
+        return len(books), genres, years
+
+    def cursor_generation(self, sort_by: str = None):
+        # As posições do cursor são índices na sequência de resultados, que
+        # qualquer escrita pode deslocar: o cursor vale só para a versão em
+        # que foi gerado
+        return self.version()
+
+    def page(self, title: str, author: str, year: int, genre: str, position, skip: int, limit: int,
+             year_range=None, pages_range=None, sort_by: str = None, descending: bool = False):
+        # Devolve os livros da página e a posição da próxima (ou None). Com
+        # `sort_by`, empates seguem a ordem do catálogo e a ordem decrescente
+        # é o inverso exato da crescente.
+        start = (position or 0) + skip
+        matches = (
+            book for book in self.all()
+            if book_matches(book, title, author, year, genre) and book_in_ranges(book, year_range, pages_range)
+        )
+        if sort_by:
+            matches = sorted(matches, key=attrgetter(sort_by))
+            if descending:
+                matches.reverse()
+        books = list(islice(matches, start, start + limit + 1))
+        return books[:limit], (start + limit if len(books) > limit else None)
@@ -0,0 +1,21 @@
+import unittest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import book_router
+from services.book_service import BookService
+
+app = FastAPI()
+app.include_router(book_router.router)
+
+def book(book_id: int, **fields):
+    data = {"id": book_id, "title": f"Livro {book_id}", "author": "Autor", "year": 2000, "genre": "Romance", "pages": 100}
+    data.update(fields)
+    return data
+
+# Os testes compartilham o catálogo do BookService: cada classe usa sua
+# própria faixa de ids e filtra pelo título quando lista
+class ApiTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        BookService.load()
+        cls.client = TestClient(app)
@@ -0,0 +1,14 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Os testes usam um catálogo próprio em um diretório temporário. As variáveis
+# precisam estar definidas antes de importar o config; o mecanismo continua
+# vindo do ambiente (BOOKS_ENGINE=sharded python -m pytest, por exemplo)
+_data_dir = tempfile.mkdtemp(prefix='books-tests-')
+atexit.register(shutil.rmtree, _data_dir, True)
+os.environ["BOOKS_CSV_FILE"] = os.path.join(_data_dir, "books.csv")
+os.environ["BOOKS_SQLITE_FILE"] = os.path.join(_data_dir, "books.db")
+os.environ["BOOKS_PARQUET_FILE"] = os.path.join(_data_dir, "books.parquet")
+os.environ["BOOKS_SHARD_DIR"] = os.path.join(_data_dir, "books_shards")
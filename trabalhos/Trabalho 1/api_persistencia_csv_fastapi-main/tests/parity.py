@@ -0,0 +1,75 @@
+import random
+from models.book import Book
+
+GENRES = ["Romance", "Drama", "Ensaio", "Poesia"]
+
+def random_book(rng: random.Random, book_id: int):
+    return Book(
+        id=book_id, title=f"Livro {rng.choice(['Azul', 'Verde', 'Rubro'])} {book_id}", author=f"Autor {book_id % 7}",
+        year=rng.randint(1990, 1999), genre=rng.choice(GENRES), pages=rng.randint(50, 80),
+    )
+
+def apply_random_writes(stores, seed: int, rounds: int = 30):
+    # Aplica a mesma sequência de mutações (inserções, atualizações, trocas
+    # de id e remoções) em todos os mecanismos
+    rng = random.Random(seed)
+    next_id = max((book.id for book in stores[0].all()), default=0) + 1
+    for _ in range(rounds):
+        live = sorted(book.id for book in stores[0].all())
+        action = rng.random()
+        if action < 0.4 or not live:
+            books = [random_book(rng, next_id + i) for i in range(rng.randint(1, 8))]
+            next_id += len(books)
+            for store in stores:
+                store.add_many(books)
+        elif action < 0.6:
+            books = [random_book(rng, book_id) for book_id in rng.sample(live, min(3, len(live)))]
+            for store in stores:
+                store.replace_many(books)
+        elif action < 0.75:
+            old_id = rng.choice(live)
+            renamed = random_book(rng, next_id)
+            next_id += 1
+            for store in stores:
+                store.replace(old_id, renamed)
+        else:
+            book_ids = rng.sample(live, min(2, len(live)))
+            for store in stores:
+                store.remove_many(book_ids)
+
+QUERIES = [
+    {},
+    {"title": "azul"},
+    {"author": "Autor 3", "genre": "drama"},
+    {"year": 1995},
+    {"sort_by": "year"},
+    {"sort_by": "pages", "descending": True},
+    {"sort_by": "year", "year_range": (1992, 1996)},
+    {"sort_by": "year", "pages_range": (55, 70), "descending": True},
+    {"title": "verde", "sort_by": "pages", "year_range": (1991, 1998)},
+]
+
+# Sem sort_by, as faixas chegam aos mecanismos já com o campo delas (o
+# BookService o completa), então toda consulta com faixa o traz
+def listing(store, skip: int = 0, limit: int = 5, **query):
+    args = {"title": None, "author": None, "year": None, "genre": None, **query}
+    books, _ = store.page(
+        args.pop("title"), args.pop("author"), args.pop("year"), args.pop("genre"), None, skip, limit, **args
+    )
+    return [book.id for book in books]
+
+def snapshot(store):
+    # Tudo que a API lê de um mecanismo, para comparar dois deles
+    state = {
+        "all": [book.model_dump() for book in store.all()],
+        "count": store.count(),
+        "breakdown": [
+            {key: value for key, value in counts.items() if value} if isinstance(counts, dict) else counts
+            for counts in store.count_breakdown()
+        ],
+    }
+    for index, query in enumerate(QUERIES):
+        state[f"page {index}"] = [listing(store, skip, 4, **query) for skip in (0, 3)]
+        text = {key: query[key] for key in ("title", "author", "year", "genre") if key in query}
+        state[f"count {index}"] = store.count(**text)
+    return state
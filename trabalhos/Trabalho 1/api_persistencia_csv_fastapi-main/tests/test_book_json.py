@@ -0,0 +1,34 @@
+import json
+import unittest
+from models.book import Book
+from services.book_json import BookJsonCache
+
+def book(book_id: int, title: str = None):
+    return Book(id=book_id, title=title or f"Livro {book_id}", author="Autor", year=2000, genre="Romance", pages=100)
+
+class BookJsonCacheTest(unittest.TestCase):
+    def test_join_matches_model_dump(self):
+        cache = BookJsonCache(10)
+        books = [book(1), book(2, "Coração, \"aspas\"")]
+        self.assertEqual(json.loads(cache.join(books)), [b.model_dump() for b in books])
+        self.assertEqual(cache.join([]), b"[]")
+
+    def test_changed_book_is_serialized_again(self):
+        cache = BookJsonCache(10)
+        cache.get(book(1))
+        cache.get(book(1))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(json.loads(cache.get(book(1, "Novo")))["title"], "Novo")
+        self.assertEqual(cache.misses, 2)
+
+    def test_evicts_least_recently_used(self):
+        cache = BookJsonCache(2)
+        first, second, third = book(1), book(2), book(3)
+        cache.get(first)
+        cache.get(second)
+        cache.get(first)
+        cache.get(third)
+        self.assertEqual((len(cache), cache.evictions), (2, 1))
+        cache.get(first)
+        cache.get(second)
+        self.assertEqual(cache.hits, 2)
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from models.book import Book
+from services import book_store, columnar_book_store
+from services.book_store import BookStore
+from services.book_writer import BookWriter
+from services.columnar_book_store import ColumnarBookStore
+from services.sharded_book_store import ShardedBookStore
+
+def book(book_id: int):
+    return Book(id=book_id, title=f"Livro {book_id}", author="Autor", year=2000, genre="Romance", pages=100)
+
+class GroupCommitFailureTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.directory.name, "books.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def submit_all(self, writer, ids):
+        # Envia as inserções ao mesmo tempo, para que caiam no mesmo lote
+        outcomes = {}
+
+        def add(book_id):
+            try:
+                outcomes[book_id] = writer.submit("add", book(book_id))
+            except OSError as e:
+                outcomes[book_id] = e
+
+        threads = [threading.Thread(target=add, args=(book_id,)) for book_id in ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_failed_write_is_rolled_back(self):
+        shard_dir = os.path.join(self.directory.name, "shards")
+        engines = (
+            (lambda: BookStore(self.csv_file), book_store),
+            (lambda: ColumnarBookStore(self.csv_file), columnar_book_store),
+            (lambda: ShardedBookStore(shard_dir, 2), book_store),
+        )
+        for engine, module in engines:
+            with self.subTest(engine=engine().__class__.__name__):
+                if os.path.exists(self.csv_file):
+                    os.remove(self.csv_file)
+                store = engine()
+                store.load()
+                writer = BookWriter(store, window_ms=50, max_batch=256)
+                writer.submit("add", book(1))
+                version = store.version()
+                with mock.patch.object(module, "write_csv", side_effect=OSError("disco cheio")):
+                    outcomes = self.submit_all(writer, [2, 3])
+                self.assertTrue(all(isinstance(outcome, OSError) for outcome in outcomes.values()))
+                # Nada do lote que falhou fica visível nem é gravado depois
+                self.assertEqual([b.id for b in store.all()], [1])
+                self.assertNotEqual(store.version(), version)
+                writer.submit("add", book(4))
+                store = engine()
+                store.load()
+                self.assertEqual([b.id for b in store.all()], [1, 4])
@@ -0,0 +1,26 @@
+from tests.base import ApiTestCase, book
+
+class BulkTest(ApiTestCase):
+    def test_create_reports_each_item(self):
+        self.client.post("/livros/", json=book(3001))
+        response = self.client.post("/livros/bulk", json=[
+            book(3002),
+            book("3003", title=""),
+            book(3001),
+            {"id": "abc", "title": "Sem campos"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result["succeeded"], [3002])
+        self.assertEqual([(error["index"], error["id"]) for error in result["errors"]], [(1, 3003), (2, 3001), (3, None)])
+        self.assertEqual(result["errors"][1]["detail"], "Livro com ID 3001 já existe")
+
+    def test_update_and_delete_report_missing_ids(self):
+        self.client.post("/livros/", json=book(3101))
+        response = self.client.put("/livros/bulk", json=[book(3101, title="Novo"), book(3102)])
+        self.assertEqual(response.json()["succeeded"], [3101])
+        self.assertEqual(response.json()["errors"][0]["id"], 3102)
+        self.assertEqual(self.client.get("/livros/3101").json()["title"], "Novo")
+        response = self.client.request("DELETE", "/livros/bulk", json=[3101, 3102])
+        self.assertEqual(response.json()["succeeded"], [3101])
+        self.assertEqual(response.json()["errors"][0]["id"], 3102)
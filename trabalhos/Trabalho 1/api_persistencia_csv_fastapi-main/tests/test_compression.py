@@ -0,0 +1,19 @@
+import unittest
+from unittest import mock
+from services import book_service
+
+class CompressionConfigTest(unittest.TestCase):
+    def test_unsupported_engines_refuse_to_start(self):
+        for engine in ("sqlite", "parquet", "sharded"):
+            with self.subTest(engine=engine), \
+                    mock.patch.object(book_service, "ENGINE", engine), \
+                    mock.patch.object(book_service, "CSV_COMPRESSION", "gzip"):
+                with self.assertRaisesRegex(ValueError, "não suporta CSV comprimido"):
+                    book_service._build_store()
+
+    def test_index_mode_refuses_to_start(self):
+        with mock.patch.object(book_service, "ENGINE", "csv"), \
+                mock.patch.object(book_service, "READ_MODE", "index"), \
+                mock.patch.object(book_service, "CSV_COMPRESSION", "gzip"):
+            with self.assertRaisesRegex(ValueError, "não suporta CSV comprimido"):
+                book_service._build_store()
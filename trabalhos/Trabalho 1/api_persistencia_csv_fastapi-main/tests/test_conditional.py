@@ -0,0 +1,22 @@
+from tests.base import ApiTestCase, book
+
+class ConditionalRequestTest(ApiTestCase):
+    def test_if_none_match_returns_304(self):
+        response = self.client.get("/livros/")
+        etag = response.headers["ETag"]
+        response = self.client.get("/livros/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_weak_and_listed_etags_match(self):
+        etag = self.client.get("/livros/count").headers["ETag"]
+        response = self.client.get("/livros/count", headers={"If-None-Match": f'"outra", W/{etag}'})
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_etag(self):
+        etag = self.client.get("/livros/").headers["ETag"]
+        self.assertEqual(self.client.post("/livros/", json=book(2001)).status_code, 200)
+        response = self.client.get("/livros/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
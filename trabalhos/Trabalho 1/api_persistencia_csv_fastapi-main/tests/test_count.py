@@ -0,0 +1,29 @@
+from tests.base import ApiTestCase, book
+
+class CountTest(ApiTestCase):
+    def count(self, **params):
+        return self.client.get("/livros/count", params=params).json()
+
+    def breakdown(self):
+        return self.client.get("/livros/count/breakdown").json()
+
+    def test_counters_follow_writes(self):
+        total = self.count()
+        in_1888 = self.count(year=1888)
+        before = self.breakdown()
+        self.client.post("/livros/bulk", json=[
+            book(7001, year=1888, genre="Contagem"), book(7002, year=1888, genre="Contagem"), book(7003, year=1889),
+        ])
+        self.assertEqual(self.count(), total + 3)
+        self.assertEqual(self.count(year=1888), in_1888 + 2)
+        self.assertEqual(self.count(genre="contagem"), 2)
+        self.assertEqual(self.count(year=1888, genre="Contagem"), 2)
+        self.client.put("/livros/7002", json=book(7002, year=1889, genre="Contagem"))
+        self.client.delete("/livros/7001")
+        self.assertEqual(self.count(), total + 2)
+        self.assertEqual(self.count(year=1888), in_1888)
+        self.assertEqual(self.count(genre="Contagem"), 1)
+        after = self.breakdown()
+        self.assertEqual(after["total"], before["total"] + 2)
+        self.assertEqual(after["genres"]["Contagem"], 1)
+        self.assertEqual(after["years"]["1889"], before["years"].get("1889", 0) + 2)
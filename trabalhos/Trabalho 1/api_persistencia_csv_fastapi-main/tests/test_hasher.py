@@ -0,0 +1,46 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from services.book_hasher import CsvHasher
+
+class CsvHasherTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.directory.name, "books.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content: bytes, mode: str = "wb"):
+        with open(self.csv_file, mode) as file:
+            file.write(content)
+
+    def fresh(self):
+        return CsvHasher(self.csv_file, chunk_size=16).digest()
+
+    def test_digest_is_the_file_sha256(self):
+        content = b"id,title\n" + b"".join(b"%d,Livro %d\n" % (i, i) for i in range(20))
+        self.write(content)
+        hasher = CsvHasher(self.csv_file, chunk_size=16)
+        self.assertEqual(hasher.digest()[0], hashlib.sha256(content).hexdigest())
+        hasher.digest()
+        self.assertEqual((hasher.misses, hasher.hits), (1, 1))
+
+    def test_partial_rehash_matches_a_full_one(self):
+        content = b"id,title\n" + b"".join(b"%d,Livro %d\n" % (i, i) for i in range(20))
+        self.write(content)
+        hasher = CsvHasher(self.csv_file, chunk_size=16)
+        hasher.digest()
+        # Inserção: só anexa
+        hasher.mark_dirty(len(content))
+        self.write(b"20,Livro 20\n", "ab")
+        self.assertEqual(hasher.digest(), self.fresh())
+        # Alteração no meio do arquivo
+        with open(self.csv_file, "rb") as file:
+            content = file.read()
+        offset = content.index(b"7,Livro 7")
+        hasher.mark_dirty(offset)
+        self.write(content[:offset] + b"7,Outro\n" + content[content.index(b"8,Livro 8"):])
+        self.assertEqual(hasher.digest(), self.fresh())
+        self.assertEqual(hasher.misses, 3)
@@ -0,0 +1,23 @@
+from tests.base import ApiTestCase, book
+
+class ImportTest(ApiTestCase):
+    def test_import_reports_each_line(self):
+        self.client.post("/livros/", json=book(3201))
+        content = "\n".join([
+            "id,title,author,year,genre,pages",
+            "3202,Importado,Autor,2001,Drama,50",
+            "3203,,Autor,2001,Drama,50",
+            "xyz,Sem id,Autor,2001,Drama,50",
+            "3201,Repetido,Autor,2001,Drama,50",
+            "3202,De novo,Autor,2001,Drama,50",
+        ]) + "\n"
+        response = self.client.post("/livros/import", content=content, headers={"Content-Type": "text/csv"})
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result["imported"], 1)
+        self.assertEqual([(error["line"], error["id"]) for error in result["errors"]], [(3, 3203), (4, None), (5, 3201), (6, 3202)])
+        self.assertEqual(self.client.get("/livros/3202").json()["title"], "Importado")
+
+    def test_import_requires_header(self):
+        response = self.client.post("/livros/import", content="1,a,b,2000,c,10\n", headers={"Content-Type": "text/csv"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from models.book import Book
+from services import indexed_book_store
+from services.indexed_book_store import IndexedBookStore
+
+def book(book_id: int, title: str = None):
+    return Book(id=book_id, title=title or f"Livro {book_id}", author="Autor", year=2000, genre="Romance", pages=100)
+
+class IndexedStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.directory.name, "books.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open_store(self):
+        store = IndexedBookStore(self.csv_file)
+        store.load()
+        return store
+
+    def test_reads_during_rewrite(self):
+        store = self.open_store()
+        store.add_many([book(1), book(2), book(3)])
+        copying, release = threading.Event(), threading.Event()
+        copy = indexed_book_store.shutil.copyfileobj
+
+        def slow_copy(*args):
+            copying.set()
+            release.wait(5)
+            copy(*args)
+
+        with mock.patch.object(indexed_book_store.shutil, "copyfileobj", slow_copy):
+            writer = threading.Thread(target=store.replace, args=(2, book(20, "Novo")))
+            writer.start()
+            self.assertTrue(copying.wait(5))
+            # A cópia está em andamento: leituras respondem com o arquivo atual
+            reads = []
+            reader = threading.Thread(target=lambda: reads.append((store.get(2).title, store.version())))
+            reader.start()
+            reader.join(1)
+            self.assertFalse(reader.is_alive())
+            release.set()
+            writer.join()
+        self.assertEqual(reads[0][0], "Livro 2")
+        self.assertNotEqual(store.version(), reads[0][1])
+        self.assertIsNone(store.get(2))
+        self.assertEqual([b.id for b in store.all()], [1, 20, 3])
+        self.assertEqual(store.get(20).title, "Novo")
+        self.assertEqual(store.get(3).title, "Livro 3")
+
+    def test_sidecar_survives_writes(self):
+        store = self.open_store()
+        store.add_many([book(1), book(2), book(3)])
+        calls = []
+        index_rows = indexed_book_store.BookOffsetIndex._index_rows
+
+        def tracked(index, offset):
+            calls.append(offset)
+            return index_rows(index, offset)
+
+        with mock.patch.object(indexed_book_store.BookOffsetIndex, "_index_rows", tracked):
+            # Sem índice salvo: reconstrói do cabeçalho e salva
+            self.open_store()
+            self.assertEqual(calls, [None])
+            # Inserções depois do salvamento: indexa só a cauda
+            covered = os.path.getsize(self.csv_file)
+            store.add_many([book(4)])
+            store = self.open_store()
+            self.assertEqual(calls, [None, covered])
+            # Reescrita salva o índice de novo: a carga seguinte não lê o CSV
+            store.replace(2, book(2, "Novo"))
+            store.remove(1)
+            store = self.open_store()
+            self.assertEqual(calls, [None, covered])
+        self.assertEqual([store.get(book_id).title for book_id in (2, 3, 4)], ["Novo", "Livro 3", "Livro 4"])
+        self.assertIsNone(store.get(1))
+
+    def test_sidecar_of_an_edited_file_is_discarded(self):
+        store = self.open_store()
+        store.add_many([book(1), book(2)])
+        self.open_store()
+        # Edição no lugar que desloca as linhas sem trocar o inode
+        with open(self.csv_file, "r+b") as file:
+            content = file.read().replace(b"Livro 1,", b"Livro um,")
+            file.seek(0)
+            file.write(content)
+        store = self.open_store()
+        self.assertEqual(store.get(1).title, "Livro um")
+        self.assertEqual(store.get(2).title, "Livro 2")
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from models.book import Book
+from services.book_journal import BookJournal
+from services.book_store import BookStore
+
+def book(book_id: int, title: str = None):
+    return Book(id=book_id, title=title or f"Livro {book_id}", author="Autor", year=2000, genre="Romance", pages=100)
+
+class JournalReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.directory.name, "books.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open_store(self):
+        store = BookStore(self.csv_file, journal=BookJournal(self.csv_file), compact_bytes=1024 * 1024)
+        store.load()
+        return store
+
+    def test_replay_after_crash(self):
+        store = self.open_store()
+        store.add_many([book(1), book(2), book(3)])
+        store.replace(2, book(2, "Atualizado"))
+        store.replace(3, book(30))
+        store.remove(1)
+        # Nada foi compactado: o estado só existe no journal
+        self.assertGreater(store.journal.size(), 0)
+        # Escrita interrompida no meio da última linha
+        with open(store.journal.path, "ab") as file:
+            file.write(b'{"op": "upsert", "book": {"id": 4, "ti')
+        store = self.open_store()
+        self.assertEqual([(b.id, b.title) for b in store.all()], [(2, "Atualizado"), (30, "Livro 30")])
+        self.assertEqual(store.count(), 2)
+        # A escrita depois da recuperação sobrevive a mais um reinício
+        store.add(book(5))
+        store = self.open_store()
+        self.assertEqual([b.id for b in store.all()], [2, 30, 5])
+
+    def test_compaction_keeps_state(self):
+        store = self.open_store()
+        store.add_many([book(1), book(2)])
+        store.remove(1)
+        store.compact()
+        self.assertEqual(store.journal.size(), 0)
+        store = self.open_store()
+        self.assertEqual([b.id for b in store.all()], [2])
@@ -0,0 +1,48 @@
+from tests.base import ApiTestCase, book
+
+class CursorPaginationTest(ApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ids = list(range(1001, 1013))
+        cls.pages = {book_id: 50 + book_id % 4 for book_id in cls.ids}
+        response = cls.client.post("/livros/bulk", json=[
+            book(book_id, title=f"Paginação {book_id}", pages=cls.pages[book_id]) for book_id in cls.ids
+        ])
+        assert response.status_code == 200
+
+    def walk(self, **params):
+        params = {"title": "Paginação", "limit": 5, **params}
+        response = self.client.get("/livros/", params=params)
+        self.assertEqual(response.status_code, 200)
+        ids = [item["id"] for item in response.json()]
+        while "X-Next-Cursor" in response.headers:
+            response = self.client.get("/livros/", params={**params, "cursor": response.headers["X-Next-Cursor"]})
+            self.assertEqual(response.status_code, 200)
+            ids += [item["id"] for item in response.json()]
+        return ids
+
+    def test_cursor_walks_every_page(self):
+        self.assertEqual(self.walk(), self.ids)
+
+    def test_skip_only_applies_to_first_page(self):
+        self.assertEqual(self.walk(skip=3), self.ids[3:])
+
+    def test_sorted_cursor_walks_every_page(self):
+        # Empates seguem a ordem do catálogo; a decrescente é o inverso exato
+        ascending = sorted(self.ids, key=lambda book_id: (self.pages[book_id], book_id))
+        self.assertEqual(self.walk(sort_by="pages"), ascending)
+        self.assertEqual(self.walk(sort_by="pages", order="desc", skip=2), ascending[::-1][2:])
+
+    def test_cursor_expires_after_write(self):
+        params = {"title": "Paginação", "limit": 5}
+        cursor = self.client.get("/livros/", params=params).headers["X-Next-Cursor"]
+        self.client.post("/livros/", json=book(1099, title="Paginação 1099"))
+        self.assertEqual(self.client.delete("/livros/1099").status_code, 200)
+        response = self.client.get("/livros/", params={**params, "cursor": cursor})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "Cursor expirado")
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/livros/", params={"cursor": "nao-e-um-cursor"})
+        self.assertEqual(response.status_code, 400)
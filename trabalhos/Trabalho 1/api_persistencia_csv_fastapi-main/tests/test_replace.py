@@ -0,0 +1,21 @@
+from tests.base import ApiTestCase, book
+
+class ReplaceTest(ApiTestCase):
+    def test_rename_to_free_id(self):
+        self.client.post("/livros/", json=book(4001))
+        response = self.client.put("/livros/4001", json=book(4002, title="Renomeado"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/livros/4001").status_code, 404)
+        self.assertEqual(self.client.get("/livros/4002").json()["title"], "Renomeado")
+
+    def test_rename_to_existing_id_is_rejected(self):
+        self.client.post("/livros/bulk", json=[book(4101), book(4102)])
+        response = self.client.put("/livros/4101", json=book(4102, title="Colide"))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "Livro com ID 4102 já existe")
+        self.assertEqual(self.client.get("/livros/4101").json()["title"], "Livro 4101")
+        self.assertEqual(self.client.get("/livros/4102").json()["title"], "Livro 4102")
+
+    def test_missing_book(self):
+        response = self.client.put("/livros/4199", json=book(4199))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,39 @@
+from tests.base import ApiTestCase, book
+
+class TextSearchTest(ApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        response = cls.client.post("/livros/bulk", json=[
+            book(6001, title="Busca Memórias Póstumas", author="Machado de Assis", genre="Romance"),
+            book(6002, title="Busca Quincas Borba", author="Machado de Assis", genre="Romance"),
+            book(6003, title="Busca Os Sertões", author="Euclides da Cunha", genre="Ensaio"),
+            book(6004, title="Busca Memorial de Aires", author="Machado de Assis", genre="Romance"),
+        ])
+        assert response.status_code == 200
+
+    def ids(self, **params):
+        response = self.client.get("/livros/", params={"limit": 100, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.json()]
+
+    def test_substring_ignores_case(self):
+        self.assertEqual(self.ids(title="busca mem"), [6001, 6004])
+        self.assertEqual(self.ids(title="BUSCA", author="euclides"), [6003])
+        # Termos de uma ou duas letras não têm trigrama
+        self.assertEqual(self.ids(title="Busca Os"), [6003])
+
+    def test_combined_with_other_filters(self):
+        self.assertEqual(self.ids(title="Busca", genre="ensaio"), [6003])
+        self.assertEqual(self.ids(title="Busca", genre="Drama"), [])
+        self.assertEqual(self.ids(title="Busca", author="Machado", genre="Romance"), [6001, 6002, 6004])
+        self.assertEqual(self.client.get("/livros/count", params={"title": "Busca", "author": "Assis"}).json(), 3)
+
+    def test_follows_writes(self):
+        self.client.post("/livros/", json=book(6005, title="Busca Dom Casmurro"))
+        self.assertEqual(self.ids(title="casmurro"), [6005])
+        self.client.put("/livros/6005", json=book(6005, title="Busca Helena"))
+        self.assertEqual(self.ids(title="casmurro"), [])
+        self.assertEqual(self.ids(title="busca helena"), [6005])
+        self.client.delete("/livros/6005")
+        self.assertEqual(self.ids(title="busca helena"), [])
@@ -0,0 +1,36 @@
+import os
+import tempfile
+import unittest
+from services.book_sequence import BookSequence
+
+class SequenceLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "sequence.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open_sequence(self):
+        sequence = BookSequence(self.path)
+        sequence.load()
+        return sequence
+
+    def test_positions_survive_restart(self):
+        sequence = self.open_sequence()
+        sequence.append([3, 1, 2])
+        sequence.rename(1, 10)
+        sequence = self.open_sequence()
+        self.assertEqual([sequence[3], sequence[10], sequence[2]], [0, 1, 2])
+
+    def test_append_after_torn_line(self):
+        sequence = self.open_sequence()
+        sequence.append([1, 2])
+        # Escrita interrompida no meio da última linha
+        with open(self.path, "ab") as file:
+            file.write(b"a 3")
+        sequence = self.open_sequence()
+        sequence.append([4, 5])
+        sequence = self.open_sequence()
+        # Consultados fora de ordem: ids perdidos ganhariam a próxima posição
+        self.assertEqual([sequence[5], sequence[4], sequence[2], sequence[1]], [3, 2, 1, 0])
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from services.book_store import BookStore
+from services.sharded_book_store import ShardedBookStore
+from tests.parity import apply_random_writes, snapshot
+
+class ShardedStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open_stores(self, journal: bool):
+        reference = BookStore(os.path.join(self.directory.name, "reference.csv"))
+        sharded = ShardedBookStore(
+            os.path.join(self.directory.name, "shards"), 3, journal=journal, compact_bytes=1024 * 1024
+        )
+        reference.load()
+        sharded.load()
+        return reference, sharded
+
+    def test_follows_the_catalog_order(self):
+        # Trocas de id entre shards e empates na ordenação seguem a ordem de
+        # inserção, como nos demais mecanismos, também depois de reiniciar
+        for journal in (False, True):
+            for seed in range(3):
+                with self.subTest(journal=journal, seed=seed):
+                    self.directory.cleanup()
+                    self.directory = tempfile.TemporaryDirectory()
+                    reference, sharded = self.open_stores(journal)
+                    apply_random_writes([reference, sharded], seed)
+                    self.assertEqual(snapshot(sharded), snapshot(reference))
+                    reference, sharded = self.open_stores(journal)
+                    self.assertEqual(snapshot(sharded), snapshot(reference))
+                    apply_random_writes([reference, sharded], seed + 100, rounds=10)
+                    reference, sharded = self.open_stores(journal)
+                    self.assertEqual(snapshot(sharded), snapshot(reference))
+
+    def test_batch_writes_every_shard(self):
+        reference, sharded = self.open_stores(journal=False)
+        with sharded.batch(), reference.batch():
+            apply_random_writes([reference, sharded], seed=7, rounds=20)
+        reference, sharded = self.open_stores(journal=False)
+        self.assertEqual(snapshot(sharded), snapshot(reference))
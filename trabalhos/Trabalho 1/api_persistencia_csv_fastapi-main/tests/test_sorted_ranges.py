@@ -0,0 +1,49 @@
+import random
+from tests.base import ApiTestCase, book
+
+class SortedRangeTest(ApiTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(18)
+        cls.books = [
+            book(book_id, title=f"Faixa {book_id}", year=rng.randint(1990, 2010), pages=rng.randint(50, 500))
+            for book_id in range(5001, 5301)
+        ]
+        response = cls.client.post("/livros/bulk", json=cls.books)
+        assert response.status_code == 200
+
+    def expected(self, sort_by=None, descending=False, year_range=(None, None), pages_range=(None, None)):
+        def inside(value, bounds):
+            low, high = bounds
+            return (low is None or value >= low) and (high is None or value <= high)
+
+        matches = [
+            (position, item) for position, item in enumerate(self.books)
+            if inside(item["year"], year_range) and inside(item["pages"], pages_range)
+        ]
+        field = sort_by or ("year" if year_range != (None, None) else "pages")
+        ids = [item["id"] for _, item in sorted(matches, key=lambda match: (match[1][field], match[0]))]
+        return ids[::-1] if descending else ids
+
+    def listed(self, skip, limit, **params):
+        response = self.client.get("/livros/", params={"title": "Faixa", "skip": skip, "limit": limit, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.json()]
+
+    def test_range_on_the_other_field(self):
+        # Faixas largas percorrem o índice de ordenação; estreitas ordenam os
+        # candidatos; as duas formas devolvem a mesma ordem
+        for pages_range in ((100, 400), (120, 130), (77, 77)):
+            for descending in (False, True):
+                for skip, limit in ((0, 10), (35, 10), (0, 300)):
+                    with self.subTest(pages_range=pages_range, descending=descending, skip=skip):
+                        expected = self.expected("year", descending, pages_range=pages_range)
+                        params = {"sort_by": "year", "order": "desc" if descending else "asc",
+                                  "pages_min": pages_range[0], "pages_max": pages_range[1]}
+                        self.assertEqual(self.listed(skip, limit, **params), expected[skip:skip + limit])
+
+    def test_ranges_on_both_fields(self):
+        expected = self.expected("pages", year_range=(1995, 2005), pages_range=(100, 400))
+        params = {"sort_by": "pages", "year_min": 1995, "year_max": 2005, "pages_min": 100, "pages_max": 400}
+        self.assertEqual(self.listed(5, 20, **params), expected[5:25])
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from models.book import Book
+from services.book_store import BookStore
+from services.columnar_book_store import ColumnarBookStore
+from services.indexed_book_store import IndexedBookStore
+from services.metrics import TRUSTED_LOADS
+from services.storage_engine import is_validated
+
+def book(book_id: int, title: str):
+    return Book(id=book_id, title=title, author="Machado de Assis", year=1899, genre="Romance", pages=256)
+
+class TrustedLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.directory.name, "books.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content: str):
+        with open(self.csv_file, "w", encoding="utf-8") as file:
+            file.write(content)
+
+    def titles(self, store):
+        store.load()
+        return [(b.id, b.title, b.author) for b in store.all()]
+
+    def test_marker_skips_validation_on_next_load(self):
+        self.write("id,title,author,year,genre,pages\n1,Dom Casmurro,Machado de Assis,1899,Romance,256\n")
+        self.assertEqual(self.titles(BookStore(self.csv_file)), [(1, "Dom Casmurro", "Machado de Assis")])
+        self.assertTrue(is_validated(self.csv_file))
+        trusted = TRUSTED_LOADS.value()
+        self.assertEqual(self.titles(BookStore(self.csv_file)), [(1, "Dom Casmurro", "Machado de Assis")])
+        self.assertEqual(TRUSTED_LOADS.value(), trusted + 1)
+
+    def test_marker_is_dropped_by_an_edit(self):
+        store = BookStore(self.csv_file)
+        store.load()
+        store.add(book(1, "Dom Casmurro"))
+        self.assertTrue(is_validated(self.csv_file))
+        with open(self.csv_file, "a", encoding="utf-8") as file:
+            file.write("2,Helena,Machado de Assis,1876,Romance,200\n")
+        self.assertFalse(is_validated(self.csv_file))
+
+    def test_reordered_header(self):
+        # Colunas fora da ordem: cada carga continua lendo pelos nomes
+        content = "title,id,author,year,genre,pages\nDom Casmurro,1,Machado de Assis,1899,Romance,256\n"
+        expected = [(1, "Dom Casmurro", "Machado de Assis")]
+        for engine in (BookStore, ColumnarBookStore):
+            with self.subTest(engine=engine.__name__):
+                self.write(content)
+                self.assertEqual(self.titles(engine(self.csv_file)), expected)
+                self.assertFalse(is_validated(self.csv_file))
+                self.assertEqual(self.titles(engine(self.csv_file)), expected)
+
+    def test_reordered_header_in_index_mode(self):
+        self.write("title,id,author,year,genre,pages\nDom Casmurro,1,Machado de Assis,1899,Romance,256\n")
+        store = IndexedBookStore(self.csv_file)
+        store.load()
+        self.assertEqual(store.get(1).title, "Dom Casmurro")
+        store.add(book(2, "Helena"))
+        store = IndexedBookStore(self.csv_file)
+        self.assertEqual(self.titles(store), [(1, "Dom Casmurro", "Machado de Assis"), (2, "Helena", "Machado de Assis")])